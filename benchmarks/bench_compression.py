@@ -0,0 +1,129 @@
+"""CPU cost vs bytes saved for each encoding on the API's list payloads.
+
+Payloads are built from the response schemas with generated rows:
+GET /books, GET /reviews and the user details returned by /auth/status.
+br and zstd are skipped unless brotli and zstandard are installed.
+
+Run with: python -m benchmarks.bench_compression [rows]
+"""
+
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from src.auth.schemas import UserDetailsSchema
+from src.books.schemas import BookSchema
+from src.compression import BrotliEncoder, GzipEncoder, ZstdEncoder, brotli, zstandard
+from src.config import Config
+from src.reviews.schemas import ReviewSchema
+
+
+def make_books(rows: int) -> list[BookSchema]:
+    now = datetime(2024, 1, 1)
+    return [
+        BookSchema(
+            uid=uuid.uuid4(),
+            title=f"The Collected Works, Volume {i}",
+            author=f"Author {i % 250}",
+            publisher=f"Publisher {i % 40}",
+            published_date=date(2000, 1, 1) + timedelta(days=i % 8000),
+            page_count=120 + i % 700,
+            language="English",
+            created_at=now + timedelta(minutes=i),
+            updated_at=now + timedelta(minutes=i, seconds=30),
+        )
+        for i in range(rows)
+    ]
+
+
+def make_reviews(rows: int, books: list[BookSchema]) -> list[ReviewSchema]:
+    now = datetime(2024, 1, 1)
+    user_uid = uuid.uuid4()
+    return [
+        ReviewSchema(
+            uid=uuid.uuid4(),
+            rating=i % 5,
+            review_text=f"Review {i}: a thoughtful read, would recommend it.",
+            user_uid=user_uid,
+            book_uid=books[i % len(books)].uid,
+            created_at=now + timedelta(minutes=i),
+            updated_at=now + timedelta(minutes=i),
+        )
+        for i in range(rows)
+    ]
+
+
+def make_payloads(rows: int) -> dict[str, bytes]:
+    books = make_books(rows)
+    reviews = make_reviews(rows, books)
+    user = UserDetailsSchema(
+        uid=uuid.uuid4(),
+        username="reader",
+        email="reader@example.com",
+        first_name="Avid",
+        last_name="Reader",
+        is_verified=True,
+        password_hash="",
+        created_at=datetime(2024, 1, 1),
+        updated_at=datetime(2024, 1, 1),
+        books=books[: rows // 10],
+        reviews=reviews[: rows // 10],
+    )
+
+    return {
+        "GET /books": TypeAdapter(List[BookSchema]).dump_json(books),
+        "GET /reviews": TypeAdapter(List[ReviewSchema]).dump_json(reviews),
+        "/auth/status": user.model_dump_json().encode(),
+    }
+
+
+def settings() -> list[tuple[str, str, int, type]]:
+    levels = [
+        ("gzip", "COMPRESSION_GZIP_LEVEL", level, GzipEncoder) for level in (1, 6, 9)
+    ]
+    if brotli is not None:
+        levels += [
+            ("br", "COMPRESSION_BROTLI_QUALITY", quality, BrotliEncoder)
+            for quality in (1, 4, 6, 11)
+        ]
+    if zstandard is not None:
+        levels += [
+            ("zstd", "COMPRESSION_ZSTD_LEVEL", level, ZstdEncoder)
+            for level in (1, 3, 9, 19)
+        ]
+
+    return levels
+
+
+def bench(payload: bytes, encoder_class: type) -> tuple[float, int]:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        compressed = encoder_class().finish(payload)
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed > 0.5 and runs >= 3:
+            break
+
+    return elapsed / runs * 1000, len(compressed)
+
+
+def main(rows: int) -> None:
+    for label, payload in make_payloads(rows).items():
+        print(f"{label}: {len(payload) / 1024:.1f} KiB uncompressed")
+        for encoding, setting, level, encoder_class in settings():
+            setattr(Config, setting, level)
+            ms, size = bench(payload, encoder_class)
+            print(
+                f"  {encoding:<4} level {level:<2} {ms:8.3f} ms  "
+                f"{size / 1024:8.1f} KiB  ratio {len(payload) / size:5.1f}x  "
+                f"{len(payload) / 1024 / 1024 / (ms / 1000):7.1f} MiB/s"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
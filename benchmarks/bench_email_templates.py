@@ -0,0 +1,53 @@
+"""Render cost per message: inline str.format vs cached jinja templates.
+
+Run with: python -m benchmarks.bench_email_templates [messages]
+"""
+
+import sys
+import time
+
+from jinja2 import Template
+
+from src.email.mail import render_email_template, template_env
+
+
+INLINE_HTML = """
+    <h1>Verify Your Email</h1>
+    <p>Thank you for signing up! Please click the link below to verify your email address:</p>
+    <a href="{verification_link}">Verify Email</a>
+    """
+
+TEMPLATE_SOURCE = template_env.loader.get_source(template_env, "verify_email.html")[0]  # type: ignore
+
+
+def bench(label: str, render, messages: int) -> None:
+    start = time.perf_counter()
+    for i in range(messages):
+        render(f"http://localhost/api/v1/auth/verify_email/token-{i}")
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / messages * 1e6:8.2f} us/message")
+
+
+def main(messages: int) -> None:
+    print(f"rendering {messages} messages")
+    bench(
+        "inline str.format",
+        lambda link: INLINE_HTML.format(verification_link=link),
+        messages,
+    )
+    bench(
+        "jinja compile per message",
+        lambda link: Template(TEMPLATE_SOURCE).render(verification_link=link),
+        messages // 100 or 1,
+    )
+    bench(
+        "jinja cached template",
+        lambda link: render_email_template(
+            "verify_email.html", {"verification_link": link}
+        ),
+        messages,
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
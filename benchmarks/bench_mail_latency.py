@@ -0,0 +1,77 @@
+"""End-to-end mail task latency under mixed transactional and bulk load.
+
+Needs the broker plus one worker per queue, ideally with
+MAIL_SUPPRESS_SEND=true so SMTP time doesn't dominate:
+
+    celery -A src.celery_task.celery_app worker -Q transactional_mail
+    celery -A src.celery_task.celery_app worker -Q bulk_mail
+
+Run with: python -m benchmarks.bench_mail_latency [bulk_chunks] [transactional]
+"""
+
+import statistics
+import sys
+import time
+
+from src.celery_task import send_email_chunk_task, send_email_task
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def wait_all(pending: dict) -> list[float]:
+    latencies = []
+    while pending:
+        for result, submitted in list(pending.items()):
+            if result.ready():
+                latencies.append(time.perf_counter() - submitted)
+                del pending[result]
+        time.sleep(0.005)
+
+    return latencies
+
+
+def report(label: str, latencies: list[float]) -> None:
+    print(
+        f"{label:<15} n={len(latencies):<5} "
+        f"p50={statistics.median(latencies) * 1000:8.1f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:8.1f}ms"
+    )
+
+
+def main(bulk_chunks: int, transactional: int) -> None:
+    recipients = [f"bench{i}@example.com" for i in range(50)]
+    bulk = {}
+    for _ in range(bulk_chunks):
+        result = send_email_chunk_task.apply_async(
+            args=[recipients, "Bench", "test_email.html", {}]
+        )
+        bulk[result] = time.perf_counter()
+
+    # transactional sends arrive while the bulk backlog is still queued
+    pending = {}
+    for i in range(transactional):
+        result = send_email_task.apply_async(
+            args=[
+                [f"user{i}@example.com"],
+                "Reset Your Password",
+                "password_reset.html",
+                {"verification_link": f"http://localhost/reset/{i}"},
+            ],
+            ignore_result=False,
+        )
+        pending[result] = time.perf_counter()
+        time.sleep(0.01)
+
+    report("transactional", wait_all(pending))
+    report("bulk chunk", wait_all(bulk))
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+    )
@@ -0,0 +1,125 @@
+"""Per-request overhead of BaseHTTPMiddleware vs pure ASGI middleware.
+
+Both apps put the same logging and authorization checks in front of a
+trivial endpoint and are driven in-process through httpx's ASGI transport,
+so only the framework and middleware cost is measured.
+
+Run with: python -m benchmarks.bench_middleware [requests] [concurrency]
+"""
+
+import asyncio
+import contextlib
+import io
+import statistics
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+
+from src.auth.policy import RoutePolicy
+from src.middleware import AuthorizationMiddleware, LoggingMiddleware
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def base_http_app() -> FastAPI:
+    app = create_app()
+
+    @app.middleware("http")
+    async def custom_logging(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        duration = time.time() - start_time
+        client = request.client
+        print(
+            f"{client.host}:{client.port} - {request.method} "  # type: ignore
+            f"{request.url.path} - {response.status_code} in {duration}s"
+        )
+        return response
+
+    route_policy = RoutePolicy.from_routes(app.routes)
+
+    @app.middleware("http")
+    async def authorization_middleware(request: Request, call_next):
+        if route_policy.matches(request.method, request.url.path):
+            return await call_next(request)
+        elif "Authorization" not in request.headers:
+            return JSONResponse(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                content={"error_code": "missing_authorization_header"},
+            )
+
+        return await call_next(request)
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = create_app()
+    app.add_middleware(LoggingMiddleware)
+    app.add_middleware(
+        AuthorizationMiddleware, route_policy=RoutePolicy.from_routes(app.routes)
+    )
+
+    return app
+
+
+async def bench(app: FastAPI, requests: int, concurrency: int) -> str:
+    transport = httpx.ASGITransport(app=app)  # type: ignore
+    headers = {"Authorization": "Bearer token"}
+    latencies: list[float] = []
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+
+        async def call() -> None:
+            start = time.perf_counter()
+            response = await client.get("/ping", headers=headers)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200
+
+        for _ in range(100):
+            await call()  # warm up
+        latencies.clear()
+
+        start = time.perf_counter()
+        for _ in range(requests // concurrency):
+            await asyncio.gather(*(call() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+
+    return (
+        f"{len(latencies) / elapsed:9.0f} req/s  "
+        f"p50 {statistics.median(latencies) * 1000:6.3f} ms  "
+        f"p99 {p99 * 1000:6.3f} ms"
+    )
+
+
+async def main(requests: int, concurrency: int) -> None:
+    for label, app in (
+        ("BaseHTTPMiddleware", base_http_app()),
+        ("pure ASGI", asgi_app()),
+    ):
+        # the access log goes to stdout and would dominate the timings
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = await bench(app, requests, concurrency)
+        print(f"{label:<20} {report}")
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(main(requests, concurrency))
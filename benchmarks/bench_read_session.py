@@ -0,0 +1,62 @@
+"""Per-request cost of the committing session vs the autocommit read session.
+
+Needs DATABASE_URL pointing at a migrated database.
+
+Run with: python -m benchmarks.bench_read_session [requests]
+"""
+
+import asyncio
+import sys
+import time
+
+from sqlalchemy import event
+
+from src.books.services import BookService
+from src.db.main import async_engine, async_read_session, async_session
+
+
+book_service = BookService()
+statements = 0
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(*args):
+    global statements
+    statements += 1
+
+
+async def committing_read() -> None:
+    async with async_session() as session:
+        await book_service.get_all_books(session)
+        await session.commit()
+
+
+async def autocommit_read() -> None:
+    async with async_read_session() as session:
+        await book_service.get_all_books(session)
+
+
+async def bench(label: str, read, requests: int) -> None:
+    global statements
+    await read()  # warm the pool and statement caches
+    statements = 0
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        await read()
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{label:<22} {elapsed / requests * 1000:8.3f} ms/request "
+        f"({statements / requests:.1f} statements/request)"
+    )
+
+
+async def main(requests: int) -> None:
+    await bench("get_session + COMMIT", committing_read, requests)
+    await bench("get_read_session", autocommit_read, requests)
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
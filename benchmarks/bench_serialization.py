@@ -0,0 +1,103 @@
+"""Cost of serializing the book list through each response path.
+
+Serves the same in-memory Book rows from three otherwise identical
+endpoints, driven in-process through httpx's ASGI transport:
+
+  response_model  FastAPI's default: validate against the schema, json.dumps
+  orjson default  response_model validation, rendered by ORJSONResponse
+  trusted         src.serialization.trusted_response, no re-validation
+
+Run with: python -m benchmarks.bench_serialization [requests]
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from src.books.schemas import BookSchema
+from src.db.models import Book
+from src.serialization import trusted_response
+
+
+def make_books(rows: int) -> list[Book]:
+    now = datetime(2024, 1, 1)
+    return [
+        Book(
+            uid=uuid.uuid4(),
+            title=f"The Collected Works, Volume {i}",
+            author=f"Author {i % 250}",
+            publisher=f"Publisher {i % 40}",
+            published_date=date(2000, 1, 1) + timedelta(days=i % 8000),
+            page_count=120 + i % 700,
+            language="English",
+            user_uid=uuid.uuid4(),
+            created_at=now + timedelta(minutes=i),
+            updated_at=now + timedelta(minutes=i),
+        )
+        for i in range(rows)
+    ]
+
+
+def create_app(books: list[Book]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get(
+        "/response_model",
+        response_model=List[BookSchema],
+        response_class=JSONResponse,
+    )
+    async def response_model():
+        return books
+
+    @app.get(
+        "/orjson",
+        response_model=List[BookSchema],
+        response_class=ORJSONResponse,
+    )
+    async def orjson_default():
+        return books
+
+    @app.get("/trusted", response_model=List[BookSchema])
+    async def trusted():
+        return trusted_response(books, BookSchema)
+
+    return app
+
+
+async def bench(client: httpx.AsyncClient, path: str, requests: int) -> float:
+    await client.get(path)  # warm up
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(path)
+        assert response.status_code == 200
+    return (time.perf_counter() - start) / requests * 1000
+
+
+async def main(requests: int) -> None:
+    for rows in (1000, 10000):
+        app = create_app(make_books(rows))
+        transport = httpx.ASGITransport(app=app)  # type: ignore
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            print(f"{rows} books")
+            baseline = None
+            for label, path in (
+                ("response_model", "/response_model"),
+                ("orjson default", "/orjson"),
+                ("trusted", "/trusted"),
+            ):
+                ms = await bench(client, path, max(1, requests * 1000 // rows))
+                baseline = baseline or ms
+                print(f"  {label:<16} {ms:8.2f} ms/request  {baseline / ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50))
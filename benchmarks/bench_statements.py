@@ -0,0 +1,77 @@
+"""Per-call Python overhead of freshly built vs prebuilt service queries.
+
+Runs against in-memory SQLite so only SQLAlchemy's own work is measured:
+statement construction, cache key generation, compiled cache lookup and
+result processing.
+
+Run with: python -m benchmarks.bench_statements [calls]
+"""
+
+import sys
+import time
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlmodel import select
+
+from src.auth.services import get_user_by_email_statement
+from src.books.services import get_book_statement
+from src.db.models import Book, Review, User
+from src.reviews.service import get_review_statement
+
+
+def bench(label: str, run, calls: int) -> float:
+    run()  # populate the compiled cache
+    start = time.perf_counter()
+    for _ in range(calls):
+        run()
+    per_call = (time.perf_counter() - start) / calls * 1e6
+    print(f"  {label:<10} {per_call:8.2f} us/call")
+
+    return per_call
+
+
+def main(calls: int) -> None:
+    engine = create_engine("sqlite://")
+    for model in (User, Book, Review):
+        model.__table__.create(engine)  # type: ignore
+
+    book_uid = uuid.uuid4()
+    review_uid = uuid.uuid4()
+    email = "reader@example.com"
+
+    cases = {
+        "BookService.get_book": (
+            lambda: select(Book).where(Book.uid == book_uid),
+            get_book_statement,
+            {"book_uid": book_uid},
+        ),
+        "AuthService.get_user_by_email": (
+            lambda: select(User).where(User.email == email),
+            get_user_by_email_statement,
+            {"email": email},
+        ),
+        "ReviewService.get_review": (
+            lambda: select(Review).where(Review.uid == review_uid),
+            get_review_statement,
+            {"review_uid": review_uid},
+        ),
+    }
+
+    with Session(engine) as session:
+        for name, (build, prebuilt, params) in cases.items():
+            print(name)
+            before = bench(
+                "fresh", lambda: session.execute(build()).scalar_one_or_none(), calls
+            )
+            after = bench(
+                "prebuilt",
+                lambda: session.execute(prebuilt, params).scalar_one_or_none(),
+                calls,
+            )
+            print(f"  saved      {before - after:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -1,14 +1,21 @@
+import asyncio
 from fastapi import FastAPI, status
 from contextlib import asynccontextmanager
 
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
+from src.access_log import start_access_log, stop_access_log
 from src.books.routers import book_router
 from src.auth.routers import auth_router
 from src.reviews.routers import review_router
-from src.db.main import init_db
+from src.health.routers import health_router
+from src.db.main import close_db, init_db
 from src.db.redis import close_redis_connection
+from src.email.dispatcher import email_dispatcher
+from src.email.relay import run_relay
 from src.errors import register_error_handlers
+from src.lifecycle import drain_on_sigterm, warm_up, warm_up_until_ready
+from src.metrics import mark_process_dead
 from src.middleware import register_middleware
 from src.config import Config
 
@@ -16,21 +23,49 @@ from src.config import Config
 VERSION = Config.API_VERSION
 
 
-# @asynccontextmanager
-# async def lifespan(app: FastAPI):
-#     print("Server is starting up...")
-#     await init_db()
-#     yield
-#     print("Server is shutting down...")
-#     await close_redis_connection()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    print("Server is starting up...")
+    start_access_log()
+    # await init_db()
+    warm_up_task = None
+    try:
+        await asyncio.wait_for(warm_up(app), timeout=Config.STARTUP_WARMUP_TIMEOUT)
+    except Exception as e:
+        print(f"Warm-up incomplete, serving as not ready: {e!r}")
+        warm_up_task = asyncio.create_task(warm_up_until_ready(app))
+
+    await email_dispatcher.start()
+    drain_on_sigterm(app)
+
+    # without a separate worker the app drains its own outbox
+    relay_task = None
+    if Config.EMAIL_BACKEND == "asyncio":
+        relay_task = asyncio.create_task(run_relay(email_dispatcher))
+
+    yield
+
+    print("Server is shutting down...")
+
+    for task in (warm_up_task, relay_task):
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    await email_dispatcher.stop()
+    await close_db()
+    await close_redis_connection()
+    stop_access_log()
+    mark_process_dead()
 
 
 app = FastAPI(
-    # lifespan=lifespan,
+    lifespan=lifespan,
     title="Books",
     description="A simple RESTful API for books",
     version=VERSION,
+    default_response_class=ORJSONResponse,
 )
+app.state.ready = False
 
 app.include_router(
     book_router,
@@ -50,6 +85,8 @@ app.include_router(
     tags=["reviews"],
 )
 
+app.include_router(health_router, tags=["health"])
+
 
 register_error_handlers(app)
 
@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models import User
 from src.auth.utils import decode_token, create_access_token
-from src.db.main import get_session
+from src.db.main import get_read_session
 from src.db.redis import token_in_blocklist
 from src.auth.services import AuthService
 from src.errors import (
@@ -57,6 +57,7 @@ class TokenBearer(HTTPBearer):
             raise InvalidToken()
 
         self.verify_token_data(token_data)
+        request.state.user_uid = token_data["user"].get("user_uid")  # type: ignore
 
         return token_data  # type: ignore
 
@@ -85,7 +86,7 @@ class RefreshTokenBearer(TokenBearer):
 
 async def get_current_user(
     token_details: dict = Depends(AccessTokenBearer()),
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     user_email = token_details["user"]["email"]
     user = await auth_service.get_user_by_email(user_email, session)
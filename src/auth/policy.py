@@ -0,0 +1,80 @@
+import re
+from typing import Callable, Iterable
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute, Route
+
+
+def public_route(endpoint: Callable) -> Callable:
+    """Marks an endpoint as reachable without an Authorization header.
+
+    Apply it below the router decorator so the flag is set before the route
+    is registered.
+    """
+    endpoint.__public_route__ = True  # type: ignore
+    return endpoint
+
+
+def is_public_route(route: BaseRoute) -> bool:
+    if isinstance(route, APIRoute):
+        return getattr(route.endpoint, "__public_route__", False)
+
+    return isinstance(route, Route)  # docs, redoc and openapi.json
+
+
+class RoutePolicy:
+    """Marked routes compiled into hash lookups once, when the app is built.
+
+    Literal templates are matched by exact path, so the common case costs
+    one set lookup per request. Templates ending in a single parameter are
+    looked up by their literal prefix, which narrows the candidates to the
+    few routes whose precompiled regex is then checked. Anything else is
+    checked against every remaining regex.
+    """
+
+    def __init__(self) -> None:
+        self.paths: dict[str, set[str]] = {}
+        self.prefixes: dict[str, list[tuple[re.Pattern, set[str]]]] = {}
+        self.patterns: list[tuple[re.Pattern, set[str]]] = []
+
+    @classmethod
+    def from_routes(
+        cls,
+        routes: Iterable[BaseRoute],
+        include: Callable[[BaseRoute], bool] = is_public_route,
+    ) -> "RoutePolicy":
+        policy = cls()
+        for route in routes:
+            if isinstance(route, Route) and include(route):
+                policy.add(route)
+
+        return policy
+
+    def add(self, route: Route) -> None:
+        methods = set(route.methods or ())
+        template = route.path.rstrip("/") or "/"
+        parent, _, last = template.rpartition("/")
+
+        if "{" not in template:
+            self.paths.setdefault(template, set()).update(methods)
+        elif "{" not in parent and last.startswith("{") and ":" not in last:
+            self.prefixes.setdefault(parent, []).append((route.path_regex, methods))
+        else:
+            self.patterns.append((route.path_regex, methods))
+
+    def matches(self, method: str, path: str) -> bool:
+        stripped = path.rstrip("/") or "/"
+        if method in self.paths.get(stripped, ()):
+            return True
+
+        # a trailing slash is redirected to the route, so it matches either way
+        def match(candidates: Iterable[tuple[re.Pattern, set[str]]]) -> bool:
+            return any(
+                method in methods and (pattern.match(path) or pattern.match(stripped))
+                for pattern, methods in candidates
+            )
+
+        parent, _, last = stripped.rpartition("/")
+        if last and match(self.prefixes.get(parent, ())):
+            return True
+
+        return match(self.patterns)
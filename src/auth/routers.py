@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.policy import public_route
 from src.auth.dependencies import (
     RefreshTokenBearer,
     AccessTokenBearer,
@@ -33,6 +34,7 @@ from src.email.schemas import (
     PasswordResetRequestSchema,
 )
 from src.errors import (
+    EmailJobNotFound,
     InvalidToken,
     NewPasswordNotMatch,
     PasswordResetFailed,
@@ -41,8 +43,9 @@ from src.errors import (
     UserNotFound,
     VerificationFailed,
 )
-from src.email.mail import mail, create_message
-from src.celery_task import send_email_task
+from src.email.services import EmailOutboxService
+from src.email.dispatcher import email_dispatcher
+from src.serialization import trusted_response
 from src.config import Config
 
 
@@ -51,12 +54,14 @@ REFRESH_TOKEN_EXPIRTY = 2
 
 auth_router = APIRouter()
 auth_service = AuthService()
+email_outbox_service = EmailOutboxService()
 admin_user_role = RoleChecker(["admin", "user"])
 
 
 @auth_router.post(
     "/signup", response_model=UserSchema, status_code=status.HTTP_201_CREATED
 )
+@public_route
 async def create_user_account(
     user_data: UserCreateSchema, session: AsyncSession = Depends(get_session)
 ):
@@ -66,7 +71,6 @@ async def create_user_account(
     if user_exist:
         raise UserAlreadyExists()
 
-    new_user = await auth_service.create_user(user_data, session)
     token = create_url_safe_token(
         {
             "email": email,
@@ -75,25 +79,18 @@ async def create_user_account(
     verification_link = (
         f"http://{Config.DOMAIN}/api/{Config.API_VERSION}/auth/verify_email/{token}"
     )
-    html_message = """
-    <h1>Verify Your Email</h1>
-    <p>Thank you for signing up! Please click the link below to verify your email address:</p>
-    <a href="{verification_link}">Verify Email</a>
-    """
-    # message = create_message(
-    #     recipients=[email],
-    #     subject="Email Verification",
-    #     body=html_message.format(verification_link=verification_link),
-    # )
-    # await mail.send_message(message)
-
-    send_email_task.delay(  # type: ignore
-        [email],
+    await email_outbox_service.add_email(
+        email,
         "Email Verification",
-        html_message.format(verification_link=verification_link),
+        "verify_email.html",
+        {"verification_link": verification_link},
+        session,
     )
 
-    return JSONResponse(
+    # commits the user together with the staged outbox row
+    new_user = await auth_service.create_user(user_data, session)
+
+    return ORJSONResponse(
         status_code=status.HTTP_201_CREATED,
         content={
             "message": "User created successfully. Please check your email to verify your account.",
@@ -108,6 +105,7 @@ async def create_user_account(
 
 
 @auth_router.get("/verify_email/{token}")
+@public_route
 async def verify_email(token: str, session: AsyncSession = Depends(get_session)):
     token_data = decode_url_safe_token(token)
     if token_data is None or "email" not in token_data:
@@ -122,7 +120,7 @@ async def verify_email(token: str, session: AsyncSession = Depends(get_session))
 
         await auth_service.update_user(user, {"is_verified": True}, session)
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "message": "Email verified successfully. You can now log in.",
@@ -138,7 +136,10 @@ async def verify_email(token: str, session: AsyncSession = Depends(get_session))
     return VerificationFailed()
 
 
+# on the primary: login has no token to pin read-your-writes to, so a replica
+# could still hold the row from before a signup, verification or reset
 @auth_router.post("/login")
+@public_route
 async def login_user(
     login_data: UserLoginSchema, session: AsyncSession = Depends(get_session)
 ):
@@ -168,7 +169,7 @@ async def login_user(
                 expiry=timedelta(days=REFRESH_TOKEN_EXPIRTY),
             )
 
-            response = JSONResponse(
+            response = ORJSONResponse(
                 status_code=status.HTTP_200_OK,
                 content={
                     "message": "Login successful",
@@ -189,86 +190,84 @@ async def login_user(
 
 
 @auth_router.get("/refresh_token")
+@public_route
 async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer())):
     expired_timestamp = token_details["exp"]
 
     if datetime.fromtimestamp(expired_timestamp) > datetime.now():
         new_access_token = create_access_token(user_data=token_details["user"])
-        return JSONResponse(content={"access_token": new_access_token})
+        return ORJSONResponse(content={"access_token": new_access_token})
 
     raise InvalidToken()
 
 
 @auth_router.get("/status", response_model=UserDetailsSchema)
+@public_route
 async def get_current_user(
     user=Depends(get_current_user), _: bool = Depends(admin_user_role)
 ):
-    return user
+    return trusted_response(user, UserDetailsSchema)
 
 
 @auth_router.get("/logout")
 async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
     jti = token_details["jti"]
     await add_jti_to_blocklist(jti)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_200_OK,
         content={"message": "Logged out successfully"},
     )
 
 
 @auth_router.post("/send_email")
+@public_route
 async def send_email(emails: EmailSchema):
     addresses = emails.addresses
 
-    html = "<h1>Test Email</h1><p>This is a test email.</p>"
     subject = "Test Email"
 
-    # message = create_message(
-    #     recipients=addresses,
-    #     subject=subject,
-    #     body=html,
-    # )
-
-    # await mail.send_message(message)
-    send_email_task.delay(  # type: ignore
-        addresses,
-        subject,
-        html,
+    job_id = await email_dispatcher.send_bulk(
+        addresses, subject, "test_email.html", {}
     )
 
-    return JSONResponse(
-        status_code=status.HTTP_200_OK,
-        content={"message": "Email sent successfully"},
+    return ORJSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"message": "Email sending scheduled", "job_id": job_id},
     )
 
 
+@auth_router.get("/send_email/{job_id}")
+@public_route
+async def get_send_email_status(job_id: str):
+    job_status = await email_dispatcher.get_job_status(job_id)
+    if job_status is None:
+        raise EmailJobNotFound()
+
+    return ORJSONResponse(status_code=status.HTTP_200_OK, content=job_status)
+
+
 @auth_router.post("/password_reset")
+@public_route
 async def password_reset(
     email_data: PasswordResetRequestSchema,
+    session: AsyncSession = Depends(get_session),
 ):
     email = email_data.email
     token = create_url_safe_token({"email": email})
     verification_link = f"http://{Config.DOMAIN}/api/{Config.API_VERSION}/auth/password_reset_confirm/{token}"
-    html_message = """
-    <h1>Password Reset Request</h1>
-    <p>We received a request to reset your password. Please click the link below to reset your password:</p>
-    <a href="{verification_link}">Reset Password</a>
-    """
-    # message = create_message(
-    #     recipients=[email],
-    #     subject="Reset Your Password",
-    #     body=html_message.format(verification_link=verification_link),
-    # )
-
-    # await mail.send_message(message)
-
-    send_email_task.delay(  # type: ignore
-        [email],
-        "Reset Your Password",
-        html_message.format(verification_link=verification_link),
-    )
 
-    return JSONResponse(
+    # unknown addresses get the same response but never reach the queue
+    if await auth_service.user_exists(email, session):
+        await email_outbox_service.add_email(
+            email,
+            "Reset Your Password",
+            "password_reset.html",
+            {"verification_link": verification_link},
+            session,
+        )
+        await session.commit()
+
+    return ORJSONResponse(
         status_code=status.HTTP_200_OK,
         content={
             "message": "Password reset email sent successfully. Please check your email.",
@@ -278,6 +277,7 @@ async def password_reset(
 
 
 @auth_router.post("/password_reset_confirm/{token}")
+@public_route
 async def password_reset_confirm(
     token: str,
     passwords: PasswordResetConfirmationSchema,
@@ -302,7 +302,7 @@ async def password_reset_confirm(
         password_hash = generate_password_hash(new_password)
         await auth_service.update_user(user, {"password_hash": password_hash}, session)
 
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_200_OK,
             content={
                 "message": "Password reset successfully. You can now log in with your new password.",
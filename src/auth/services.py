@@ -1,4 +1,5 @@
 from src.db.models import User
+from sqlalchemy import bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, desc
 
@@ -6,10 +7,12 @@ from src.auth.schemas import UserCreateSchema, UserUpdateSchema
 from src.auth.utils import generate_password_hash
 
 
+get_user_by_email_statement = select(User).where(User.email == bindparam("email"))
+
+
 class AuthService:
     async def get_user_by_email(self, email: str, session: AsyncSession):
-        statement = select(User).where(User.email == email)
-        result = await session.execute(statement)
+        result = await session.execute(get_user_by_email_statement, {"email": email})
 
         return result.scalar_one_or_none()
 
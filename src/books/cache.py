@@ -0,0 +1,33 @@
+from src.books.schemas import BookSchema
+from src.books.services import BookService
+from src.conditional import make_etag
+from src.config import Config
+from src.db.main import async_read_session
+from src.response_cache import CachedBody, StaleWhileRevalidateCache
+from src.serialization import trusted_response
+
+
+book_service = BookService()
+
+
+async def load_book_list() -> CachedBody:
+    # always the primary: a lagging replica's list would be cached for everyone
+    async with async_read_session() as session:
+        books = await book_service.get_all_books(session)
+
+    body = trusted_response(books, BookSchema).body
+    if not books:
+        return body, None, None
+
+    last_modified = max(book.updated_at for book in books)
+    return body, make_etag("books", len(books), last_modified), last_modified
+
+
+book_list_cache = StaleWhileRevalidateCache(
+    "books:list",
+    load_book_list,
+    fresh_ttl=Config.BOOK_LIST_CACHE_FRESH_TTL,
+    stale_ttl=Config.BOOK_LIST_CACHE_STALE_TTL,
+    lock_timeout=Config.BOOK_LIST_CACHE_LOCK_TIMEOUT,
+    invalidate_on_write=Config.BOOK_LIST_CACHE_INVALIDATE_ON_WRITE,
+)
@@ -1,5 +1,5 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.books.schemas import (
@@ -8,13 +8,23 @@ from src.books.schemas import (
     BookSchema,
     BookCreateSchema,
 )
-from src.db.main import get_session
+from src.db.main import async_read_session, get_session
+from src.books.cache import book_list_cache
 from src.books.services import BookService
 from src.auth.dependencies import (
     RoleChecker,
     AccessTokenBearer,
+    get_current_user,
 )
+from src.conditional import make_etag
 from src.errors import BookNotFound
+from src.idempotency import idempotent
+from src.response_cache import (
+    cached_body_response,
+    cached_response,
+    purge_surrogate_keys,
+)
+from src.serialization import trusted_response
 
 
 book_router = APIRouter()
@@ -27,11 +37,14 @@ admin_user_role = RoleChecker(["admin", "user"])
     "/", response_model=List[BookSchema], dependencies=[Depends(admin_user_role)]
 )
 async def get_all_books(
-    session: AsyncSession = Depends(get_session),
+    request: Request,
     token_details: dict = Depends(access_token_bearer),
 ):
-    books = await book_service.get_all_books(session)
-    return books
+    # the validators come from the cached entry, so they always describe the
+    # body being served, even while it is stale
+    cached, state = await book_list_cache.get()
+
+    return await cached_body_response(request, cached, {"X-Cache": state})
 
 
 @book_router.get(
@@ -41,11 +54,22 @@ async def get_all_books(
 )
 async def get_user_books(
     user_uid: str,
-    session: AsyncSession = Depends(get_session),
-    token_details: dict = Depends(access_token_bearer),
+    request: Request,
+    current_user=Depends(get_current_user),
 ):
-    books = await book_service.get_user_book(user_uid, session)
-    return books
+    async def load():
+        async with async_read_session() as session:
+            books = await book_service.get_user_book(user_uid, session)
+
+        body = trusted_response(books, BookSchema).body
+        if not books:
+            return (body, None, None), ["books:list"]
+
+        last_modified = max(book.updated_at for book in books)
+        etag = make_etag("books", user_uid, len(books), last_modified)
+        return (body, etag, last_modified), ["books:list"]
+
+    return await cached_response(request, current_user.role, load)
 
 
 @book_router.post(
@@ -54,6 +78,7 @@ async def get_user_books(
     response_model=BookSchema,
     dependencies=[Depends(admin_user_role)],
 )
+@idempotent
 async def create_book(
     book_data: BookCreateSchema,
     session: AsyncSession = Depends(get_session),
@@ -61,22 +86,44 @@ async def create_book(
 ) -> BookSchema:
     user_id = token_details["user"]["user_uid"]
     new_book = await book_service.create_book(book_data, user_id, session)
+    await purge_surrogate_keys(["books:list"])
+    await book_list_cache.invalidate()
 
     return new_book  # type: ignore
 
 
-@book_router.get("/{book_uid}", response_model=BookDetailSchema)
+@book_router.get(
+    "/{book_uid}",
+    response_model=BookDetailSchema,
+    dependencies=[Depends(admin_user_role)],
+)
 async def get_book(
     book_uid: str,
-    session: AsyncSession = Depends(get_session),
-    token_details: dict = Depends(access_token_bearer),
-    dependencies=[Depends(admin_user_role)],
+    request: Request,
+    current_user=Depends(get_current_user),
 ):
-    book = await book_service.get_book(book_uid, session)
-    if not book:
-        raise BookNotFound()
-
-    return book
+    async def load():
+        async with async_read_session() as session:
+            book = await book_service.get_book(book_uid, session)
+        if not book:
+            raise BookNotFound()
+
+        # the count catches deleted reviews, which leave the timestamps alone
+        reviews_updated_at = max(
+            (review.updated_at for review in book.reviews), default=None
+        )
+        etag = make_etag(
+            book_uid, book.updated_at, len(book.reviews), reviews_updated_at
+        )
+        last_modified = max(book.updated_at, reviews_updated_at or book.updated_at)
+        body = trusted_response(book, BookDetailSchema).body
+
+        # tagged with its reviews too, so review writes purge the detail
+        surrogate_keys = [f"book:{book_uid}"]
+        surrogate_keys += [f"review:{review.uid}" for review in book.reviews]
+        return (body, etag, last_modified), surrogate_keys
+
+    return await cached_response(request, current_user.role, load)
 
 
 @book_router.patch(
@@ -92,6 +139,9 @@ async def update_book(
     if updated_book is None:
         raise BookNotFound()
 
+    await purge_surrogate_keys(["books:list", f"book:{book_uid}"])
+    await book_list_cache.invalidate()
+
     return updated_book  # type: ignore
 
 
@@ -109,4 +159,8 @@ async def delete_book(
     if not is_deleted:
         raise BookNotFound()
 
+    # the book's reviews are kept with their book_uid cleared
+    await purge_surrogate_keys(["books:list", f"book:{book_uid}", "reviews:list"])
+    await book_list_cache.invalidate()
+
     return {}
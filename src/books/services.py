@@ -1,5 +1,6 @@
 import uuid
 from fastapi import HTTPException, status
+from sqlalchemy import bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, desc
 from datetime import datetime
@@ -8,16 +9,20 @@ from src.db.models import Book
 from src.books.schemas import BookCreateSchema, BookUpdateSchema
 
 
+# built once: sqlalchemy memoizes the cache key on the statement object, so
+# each call skips construction and goes straight to the compiled cache
+get_all_books_statement = select(Book).order_by(desc(Book.updated_at))
+get_book_statement = select(Book).where(Book.uid == bindparam("book_uid"))
+
+
 class BookService:
     async def get_all_books(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.updated_at))
-        result = await session.execute(statement)
+        result = await session.execute(get_all_books_statement)
 
         return result.scalars().all()
 
     async def get_book(self, book_uid: str, session: AsyncSession):
-        statement = select(Book).where(Book.uid == book_uid)
-        result = await session.execute(statement)
+        result = await session.execute(get_book_statement, {"book_uid": book_uid})
 
         return result.scalar_one_or_none()
 
@@ -1,18 +1,186 @@
-from celery import Celery
+from typing import Optional
+from celery import Celery, group, signals, states
+from celery.backends.base import BaseKeyValueStoreBackend
+from celery.result import GroupResult
 from asgiref.sync import async_to_sync
+from fastapi_mail.errors import ConnectionErrors
+from kombu.exceptions import ChannelError
+from prometheus_client import start_http_server
+import logging
 import os
-from src.email.mail import create_message, mail
+import threading
+import time
+from src.email.mail import create_message, mail, render_email_template
+from src.config import Config
+from src.metrics import (
+    celery_queue_depth,
+    celery_task_duration_seconds,
+    celery_task_retries,
+    celery_task_wait_seconds,
+    email_stage_duration_seconds,
+    get_registry,
+)
 
 os.environ["FORKED_BY_MULTIPROCESSING"] = (
     "1"  # Fix for Windows compatibility with Celery and FastAPI Mail
 )
 
+logger = logging.getLogger(__name__)
+
 celery_app = Celery()
 celery_app.config_from_object("src.config")
 
 
+def send_rendered_email(
+    recipients: list[str], subject: str, template_name: str, context: dict
+) -> None:
+    with email_stage_duration_seconds.labels(stage="render").time():
+        body = render_email_template(template_name, context)
+        message = create_message(recipients=recipients, subject=subject, body=body)
+
+    with email_stage_duration_seconds.labels(stage="smtp").time():
+        async_to_sync(mail.send_message)(message)
+
+
 @celery_app.task()
-def send_email_task(recipients: list[str], subject: str, body: str):
-    message = create_message(recipients=recipients, subject=subject, body=body)
+def send_email_task(
+    recipients: list[str], subject: str, template_name: str, context: dict
+):
+    send_rendered_email(recipients, subject, template_name, context)
+
+
+# rate_limit is enforced per worker, so the effective SMTP rate is
+# MAIL_CHUNK_RATE_LIMIT multiplied by the number of workers consuming chunks
+@celery_app.task(
+    ignore_result=False,  # chunk results feed the bulk job progress
+    autoretry_for=(ConnectionErrors,),
+    retry_backoff=True,
+    max_retries=Config.MAIL_CHUNK_MAX_RETRIES,
+    rate_limit=Config.MAIL_CHUNK_RATE_LIMIT,
+)
+def send_email_chunk_task(
+    recipients: list[str], subject: str, template_name: str, context: dict
+) -> int:
+    send_rendered_email(recipients, subject, template_name, context)
+
+    return len(recipients)
+
+
+def dispatch_email_chunks(
+    recipients: list[str], subject: str, template_name: str, context: dict
+) -> str:
+    chunk_size = Config.MAIL_CHUNK_SIZE
+    job = group(
+        send_email_chunk_task.s(
+            recipients[i : i + chunk_size], subject, template_name, context
+        )
+        for i in range(0, len(recipients), chunk_size)
+    )
+    result = job.apply_async()
+    result.save()  # persist the group so progress can be restored by job id
+
+    return result.id
+
+
+def fetch_chunk_meta(result: GroupResult) -> list[dict]:
+    """One snapshot of every chunk's state, fetched with a single MGET.
+
+    The GroupResult helpers (failed, successful, ready, completed_count)
+    each fetch the meta of every pending chunk again, so a status poll on a
+    large job would cost several round trips per chunk.
+    """
+    backend = result.backend
+    task_ids = [chunk.id for chunk in result.results]
+    if not isinstance(backend, BaseKeyValueStoreBackend):
+        return [backend.get_task_meta(task_id) for task_id in task_ids]
+
+    values = backend.mget([backend.get_key_for_task(task_id) for task_id in task_ids])
+    return [
+        (
+            backend.decode_result(value)
+            if value is not None
+            else {"status": states.PENDING, "result": None}
+        )
+        for value in values
+    ]
+
+
+def get_email_job_status(job_id: str) -> Optional[dict]:
+    result = GroupResult.restore(job_id, app=celery_app)
+    if result is None:
+        return None
+
+    chunks = fetch_chunk_meta(result)
+    succeeded = [chunk for chunk in chunks if chunk["status"] == states.SUCCESS]
+    failed = sum(1 for chunk in chunks if chunk["status"] == states.FAILURE)
+
+    return {
+        "job_id": job_id,
+        "total_chunks": len(chunks),
+        "completed_chunks": len(succeeded),
+        "failed_chunks": failed,
+        "sent_recipients": sum(chunk["result"] for chunk in succeeded),
+        "finished": all(chunk["status"] in states.READY_STATES for chunk in chunks),
+    }
+
+
+# wall clock rather than a monotonic one: publish and start happen in
+# different processes, usually on different hosts
+@signals.before_task_publish.connect
+def record_publish_time(headers=None, **kwargs):
+    headers["published_at"] = time.time()
+
+
+_task_started: dict[str, float] = {}
+
+
+@signals.task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is not None:
+        queue = (task.request.delivery_info or {}).get("routing_key", "unknown")
+        celery_task_wait_seconds.labels(task=task.name, queue=queue).observe(
+            max(0.0, time.time() - published_at)
+        )
+
+
+@signals.task_postrun.connect
+def record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        celery_task_duration_seconds.labels(task=task.name, state=state).observe(
+            time.perf_counter() - started
+        )
+
+
+@signals.task_retry.connect
+def record_task_retry(sender=None, **kwargs):
+    celery_task_retries.labels(task=sender.name).inc()
+
+
+def sample_queue_depth() -> None:
+    queues = {route["queue"] for route in celery_app.conf.task_routes.values()}
+
+    while True:
+        try:
+            with celery_app.connection_for_read() as connection:
+                channel = connection.default_channel
+                for queue in queues:
+                    try:
+                        declared = channel.queue_declare(queue, passive=True)
+                        depth = declared.message_count
+                    except ChannelError:
+                        depth = 0  # the broker drops empty queues
+                    celery_queue_depth.labels(queue=queue).set(depth)
+        except Exception as e:
+            logger.exception(e)
+
+        time.sleep(Config.CELERY_QUEUE_SAMPLE_INTERVAL)
+
 
-    async_to_sync(mail.send_message)(message)
+@signals.worker_ready.connect
+def start_worker_metrics(**kwargs):
+    start_http_server(Config.CELERY_METRICS_PORT, registry=get_registry())
+    threading.Thread(target=sample_queue_depth, daemon=True).start()
@@ -0,0 +1,222 @@
+import zlib
+from typing import Callable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import Config
+
+# br and zstd are offered only when their packages are installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+class Encoder:
+    def compress(self, data: bytes) -> bytes:
+        """Returns whatever output is ready, flushed so a stream can send it"""
+        raise NotImplementedError("Please override this method in child classes")
+
+    def finish(self, data: bytes) -> bytes:
+        raise NotImplementedError("Please override this method in child classes")
+
+
+class GzipEncoder(Encoder):
+    def __init__(self) -> None:
+        self.compressor = zlib.compressobj(
+            Config.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16
+        )
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush()
+
+
+class BrotliEncoder(Encoder):
+    def __init__(self) -> None:
+        self.compressor = brotli.Compressor(  # type: ignore
+            mode=brotli.MODE_TEXT,  # type: ignore
+            quality=Config.COMPRESSION_BROTLI_QUALITY,
+        )
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self, data: bytes) -> bytes:
+        return self.compressor.process(data) + self.compressor.finish()
+
+
+class ZstdEncoder(Encoder):
+    def __init__(self) -> None:
+        self.compressor = zstandard.ZstdCompressor(  # type: ignore
+            level=Config.COMPRESSION_ZSTD_LEVEL
+        ).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK  # type: ignore
+        )
+
+    def finish(self, data: bytes) -> bytes:
+        return self.compressor.compress(data) + self.compressor.flush()
+
+
+def available_encoders() -> dict[str, Callable[[], Encoder]]:
+    encoders: dict[str, Callable[[], Encoder]] = {"gzip": GzipEncoder}
+    if brotli is not None:
+        encoders["br"] = BrotliEncoder
+    if zstandard is not None:
+        encoders["zstd"] = ZstdEncoder
+
+    # keep the configured preference order, which breaks ties between
+    # encodings the client weights equally
+    return {
+        name: encoders[name]
+        for name in Config.COMPRESSION_ENCODINGS
+        if name in encoders
+    }
+
+
+def negotiate_encoding(accept_encoding: str, offered: list[str]) -> Optional[str]:
+    weights: dict[str, float] = {}
+    for entry in accept_encoding.split(","):
+        name, _, params = entry.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in offered:
+        weight = weights.get(name, wildcard)
+        if weight > best_weight:
+            best, best_weight = name, weight
+
+    return best
+
+
+class CompressionMiddleware:
+    """Negotiated gzip, br or zstd compression of text responses.
+
+    Bodies sent in one message are compressed whole once they reach
+    COMPRESSION_MINIMUM_SIZE. Streaming bodies are compressed chunk by chunk
+    and flushed after each one, so clients still see data as it is produced.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.encoders = available_encoders()
+        self.offered = list(self.encoders)
+        self.minimum_size = Config.COMPRESSION_MINIMUM_SIZE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding, self.offered)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(
+            send, encoding, self.encoders[encoding], self.minimum_size
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class CompressionResponder:
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        create_encoder: Callable[[], Encoder],
+        minimum_size: int,
+    ) -> None:
+        self.downstream = send
+        self.encoding = encoding
+        self.create_encoder = create_encoder
+        self.minimum_size = minimum_size
+        self.start_message: Optional[Message] = None
+        self.encoder: Optional[Encoder] = None
+        self.passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if self.passthrough:
+            await self.downstream(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or not content_type.startswith(
+                COMPRESSIBLE_TYPES
+            ):
+                self.passthrough = True
+                await self.downstream(message)
+            else:
+                self.start_message = message  # held until the first body chunk
+            return
+
+        if message["type"] != "http.response.body":
+            await self.downstream(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.downstream(self.start_message)  # type: ignore
+                await self.downstream(message)
+                return
+
+            self.encoder = self.create_encoder()
+            headers = MutableHeaders(scope=self.start_message)
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.encoder.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self.downstream(self.start_message)  # type: ignore
+                await self.downstream({"type": "http.response.body", "body": body})
+                return
+
+            await self.downstream(self.start_message)  # type: ignore
+
+        if more_body:
+            body = self.encoder.compress(body)
+        else:
+            body = self.encoder.finish(body)
+
+        await self.downstream(
+            {"type": "http.response.body", "body": body, "more_body": more_body}
+        )
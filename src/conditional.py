@@ -0,0 +1,81 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(
+        ":".join(map(str, parts)).encode(), digest_size=8
+    ).hexdigest()
+
+    # weak, because compression sends different bytes for the same content
+    return f'W/"{digest}"'
+
+
+def as_utc(value: datetime) -> datetime:
+    # naive timestamps come from datetime.now() on hosts running in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+
+    return value.astimezone(timezone.utc)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Evaluates If-None-Match, or If-Modified-Since when no ETag was sent.
+
+    Last-Modified cannot see deletions (a removed review leaves the newest
+    timestamp alone), so clients should prefer If-None-Match.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+
+    try:
+        since = as_utc(parsedate_to_datetime(if_modified_since))
+    except (TypeError, ValueError):
+        return False
+
+    # HTTP dates have whole seconds
+    return as_utc(last_modified).replace(microsecond=0) <= since
+
+
+def validator_headers(etag: str, last_modified: datetime) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(as_utc(last_modified), usegmt=True),
+    }
+
+
+async def conditional_response(
+    request: Request,
+    etag: str,
+    last_modified: datetime,
+    respond: Callable[[], Awaitable[Response]],
+) -> Response:
+    """Answers 304 from the validators alone, else builds the full response"""
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response = await respond()
+    response.headers.update(headers)
+
+    return response
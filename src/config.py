@@ -1,5 +1,5 @@
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from dotenv import load_dotenv
 
@@ -9,12 +9,33 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", "env", ".e
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_PGBOUNCER: bool = False
+    DATABASE_REPLICA_URLS: List[str] = []
+    DB_REPLICA_SELECTION: str = "round_robin"  # "round_robin" or "least_busy"
+    DB_READ_YOUR_WRITES_SECONDS: int = 5
+
+    SQL_QUERY_BUDGET: int = 0  # max queries per request, 0 disables the check
+    SQL_REPEATED_STATEMENT_LIMIT: int = 0  # max runs of one statement shape
+    SQL_BUDGET_MODE: str = "warn"  # "warn" or "fail", use "fail" in dev/test
     JWT_SECRET: str
     JWT_ALGORITHM: str
 
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_URL: str
+    REDIS_MODE: str = "standalone"  # "standalone", "cluster" or "sentinel"
+    REDIS_SENTINELS: List[str] = []  # "host:port" entries for sentinel mode
+    REDIS_SENTINEL_MASTER: str = "mymaster"
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_SOCKET_TIMEOUT: float = 5.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 5.0
+    REDIS_HEALTH_CHECK_INTERVAL: int = 30
 
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
@@ -26,6 +47,55 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = False
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
+    MAIL_SUPPRESS_SEND: bool = False
+    MAIL_CHUNK_SIZE: int = 50
+    MAIL_CHUNK_RATE_LIMIT: str = "30/m"
+    MAIL_CHUNK_MAX_RETRIES: int = 3
+    EMAIL_DEDUP_WINDOW_MINUTES: int = 10
+    EMAIL_OUTBOX_BATCH_SIZE: int = 100
+    EMAIL_OUTBOX_POLL_INTERVAL: float = 1.0
+    EMAIL_OUTBOX_RETENTION_HOURS: int = 24
+    EMAIL_BACKEND: str = "celery"  # "celery" or "asyncio"
+    EMAIL_ASYNC_CONCURRENCY: int = 4
+    EMAIL_ASYNC_QUEUE_SIZE: int = 1000
+    EMAIL_ASYNC_DRAIN_TIMEOUT: float = 30.0
+    EMAIL_ASYNC_JOB_TTL: int = 3600  # seconds a finished bulk job's status is kept
+
+    CELERY_PREFETCH_MULTIPLIER: int = 1
+    CELERY_VISIBILITY_TIMEOUT: int = 3600
+    CELERY_METRICS_PORT: int = 9808
+    CELERY_QUEUE_SAMPLE_INTERVAL: float = 15.0
+
+    STARTUP_WARMUP_TIMEOUT: float = 10.0
+    DB_WARMUP_CONNECTIONS: int = 2
+    REDIS_WARMUP_CONNECTIONS: int = 2
+    SHUTDOWN_DRAIN_DELAY: float = 10.0  # seconds readiness fails before shutdown
+    HEALTH_CHECK_TTL: float = 2.0
+    HEALTH_CHECK_TIMEOUT: float = 1.0
+
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_ROUTE_SAMPLE_RATES: Dict[str, float] = {}  # route template -> rate
+    ACCESS_LOG_SLOW_MS: float = 500.0
+    ACCESS_LOG_ALWAYS_STATUS: int = 500  # statuses from here up are never sampled
+    ACCESS_LOG_QUEUE_SIZE: int = 10000
+
+    COMPRESSION_ENCODINGS: List[str] = ["zstd", "br", "gzip"]  # preference order
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: int = 60
+    BOOK_LIST_CACHE_FRESH_TTL: int = 30
+    BOOK_LIST_CACHE_STALE_TTL: int = 300  # seconds a stale list may still be served
+    BOOK_LIST_CACHE_LOCK_TIMEOUT: int = 30
+    BOOK_LIST_CACHE_INVALIDATE_ON_WRITE: bool = True
+    IDEMPOTENCY_TTL: int = 24 * 3600
+    IDEMPOTENCY_LOCK_TIMEOUT: int = 30  # frees keys held by a crashed worker
+    IDEMPOTENCY_WAIT_TIMEOUT: float = 10.0
+    IDEMPOTENCY_POLL_INTERVAL: float = 0.05
+    IDEMPOTENCY_KEY_MAX_LENGTH: int = 255
 
     API_VERSION: str = "v1"
     DOMAIN: str
@@ -33,5 +103,34 @@ class Settings(BaseSettings):
 
 
 Config = Settings()  # type: ignore
+
+# celery settings, loaded through celery_app.config_from_object("src.config")
 broker_url = Config.REDIS_URL
 result_backend = Config.REDIS_URL
+result_expires = 24 * 3600
+
+# verification and reset mail must not wait behind bulk sends, so each kind
+# gets its own queue and should be consumed by its own worker
+task_default_queue = "transactional_mail"
+task_routes = {
+    "src.celery_task.send_email_task": {
+        "queue": "transactional_mail",
+        "priority": 0,
+    },
+    "src.celery_task.send_email_chunk_task": {
+        "queue": "bulk_mail",
+        "priority": 9,
+    },
+}
+broker_transport_options = {
+    "queue_order_strategy": "priority",
+    "priority_steps": list(range(10)),
+    "visibility_timeout": Config.CELERY_VISIBILITY_TIMEOUT,
+}
+
+# one task reserved per process so a slow SMTP batch can't hoard the queue,
+# acked after it runs so a crashed worker hands the mail to another one
+worker_prefetch_multiplier = Config.CELERY_PREFETCH_MULTIPLIER
+task_acks_late = True
+task_reject_on_worker_lost = True
+task_ignore_result = True
@@ -0,0 +1,50 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+PLACEHOLDER_LIST = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    def most_repeated(self) -> tuple[Optional[str], int]:
+        """Groups statements by shape, so IN lists of any length count as one"""
+        shapes: Counter = Counter()
+        for statement, count in self.statements.items():
+            shapes[PLACEHOLDER_LIST.sub("?", statement)] += count
+
+        if not shapes:
+            return None, 0
+
+        return shapes.most_common(1)[0]
+
+
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def record_query(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info["query_start"].pop()
+        stats = query_stats.get()
+        if stats is None:
+            return
+
+        stats.count += 1
+        stats.duration += time.perf_counter() - start
+        stats.statements[statement] += 1
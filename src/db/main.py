@@ -1,23 +1,138 @@
+import asyncio
+import itertools
+import time
+import uuid
 from typing import AsyncGenerator
+from fastapi import Request
 from sqlmodel import SQLModel
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
     async_sessionmaker,
 )
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.config import Config
+from src.db.instrumentation import instrument_engine
 from src.db.models import Book
+from src.db.redis import has_recent_write, mark_recent_write
+from src.metrics import (
+    db_pool_capacity,
+    db_pool_checkout_wait_seconds,
+    db_pool_connections_checked_out,
+)
 
 
-async_engine = create_async_engine(
-    url=Config.DATABASE_URL,
-    future=True,
-)
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Records how long each checkout waits for a free connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait_seconds.observe(time.perf_counter() - start)
+
+
+def get_connect_args() -> dict:
+    if Config.DB_PGBOUNCER:
+        # pgbouncer in transaction mode hands each transaction a different
+        # server connection, so prepared statements must not be reused
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+
+    return {
+        "statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": Config.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def count_pool_connections(engine, pool_name: str) -> None:
+    """Keeps the checked-out gauge current from pool events, in every process"""
+    checked_out = db_pool_connections_checked_out.labels(pool=pool_name)
+    db_pool_capacity.labels(pool=pool_name).set(
+        Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW
+    )
+
+    @event.listens_for(engine.sync_engine, "checkout")
+    def count_checkout(*args):
+        checked_out.inc()
+
+    @event.listens_for(engine.sync_engine, "checkin")
+    def count_checkin(*args):
+        checked_out.dec()
+
+
+def create_engine(url: str, pool_name: str):
+    engine = create_async_engine(
+        url=url,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_timeout=Config.DB_POOL_TIMEOUT,
+        pool_recycle=Config.DB_POOL_RECYCLE,
+        pool_pre_ping=Config.DB_POOL_PRE_PING,
+        connect_args=get_connect_args(),
+    )
+    instrument_engine(engine)
+    count_pool_connections(engine, pool_name)
+
+    return engine
+
+
+def create_read_sessionmaker(engine) -> async_sessionmaker:
+    # autocommit shares the engine's pool but never emits BEGIN, COMMIT or
+    # the rollback on checkin, so a read costs only its own statements
+    return async_sessionmaker(
+        bind=engine.execution_options(isolation_level="AUTOCOMMIT"),
+        class_=AsyncSession,
+        expire_on_commit=False,
+        info={"read_only": True},
+    )
+
+
+async_engine = create_engine(Config.DATABASE_URL, "primary")
 async_session = async_sessionmaker(
     bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
+async_read_session = create_read_sessionmaker(async_engine)
+
+replica_engines = [
+    create_engine(url, f"replica_{index}")
+    for index, url in enumerate(Config.DATABASE_REPLICA_URLS)
+]
+replica_sessions = [create_read_sessionmaker(engine) for engine in replica_engines]
+_replica_cycle = itertools.cycle(range(len(replica_sessions)))
+
+
+def choose_replica_session() -> async_sessionmaker:
+    if Config.DB_REPLICA_SELECTION == "least_busy":
+        index = min(
+            range(len(replica_engines)),
+            key=lambda i: replica_engines[i].pool.checkedout(),  # type: ignore
+        )
+    else:
+        index = next(_replica_cycle)
+
+    return replica_sessions[index]
+
+
+@event.listens_for(Session, "before_flush")
+def reject_read_only_writes(session, flush_context, instances):
+    # there is no transaction to roll back on a read session
+    if session.info.get("read_only"):
+        raise RuntimeError("Read-only sessions cannot flush changes")
+
+
+@event.listens_for(Session, "after_flush")
+def flag_session_writes(session, flush_context):
+    session.info["has_writes"] = True
 
 
 async def init_db():
@@ -25,7 +140,25 @@ async def init_db():
         await conn.run_sync(SQLModel.metadata.create_all)
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+async def warm_up_db(connections: int) -> None:
+    """Opens and pings pooled connections so first requests don't pay for them"""
+
+    async def ping(engine):
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    engines = [async_engine, *replica_engines]
+    await asyncio.gather(
+        *(ping(engine) for engine in engines for _ in range(connections))
+    )
+
+
+async def close_db() -> None:
+    for engine in [async_engine, *replica_engines]:
+        await engine.dispose()
+
+
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         try:
             yield session
@@ -33,3 +166,19 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
         except Exception as e:
             await session.rollback()
             raise e
+
+        # keep this user's reads on the primary until replicas catch up
+        user_uid = getattr(request.state, "user_uid", None)
+        if replica_sessions and user_uid and session.info.get("has_writes"):
+            await mark_recent_write(user_uid)
+
+
+async def get_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    session_maker = async_read_session
+    if replica_sessions:
+        user_uid = getattr(request.state, "user_uid", None)
+        if user_uid is None or not await has_recent_write(user_uid):
+            session_maker = choose_replica_session()
+
+    async with session_maker() as session:
+        yield session
@@ -1,6 +1,6 @@
 from datetime import date, datetime
 from typing import Optional, List
-from sqlmodel import Column, Field, Relationship, SQLModel
+from sqlmodel import Column, Field, Index, Relationship, SQLModel, text
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 
@@ -38,6 +38,8 @@ class User(SQLModel, table=True):
 
 
 class Book(SQLModel, table=True):
+    __table_args__ = (Index("ix_book_updated_at", "updated_at"),)
+
     uid: uuid.UUID = Field(
         sa_column=Column(
             pg.UUID,
@@ -55,7 +57,9 @@ class Book(SQLModel, table=True):
     language: str
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="user.uid")
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
-    updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    )
     user: Optional["User"] = Relationship(back_populates="books")
     reviews: List["Review"] = Relationship(
         back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
@@ -66,6 +70,8 @@ class Book(SQLModel, table=True):
 
 
 class Review(SQLModel, table=True):
+    __table_args__ = (Index("ix_review_book_uid", "book_uid"),)
+
     uid: uuid.UUID = Field(
         sa_column=Column(
             pg.UUID,
@@ -80,9 +86,44 @@ class Review(SQLModel, table=True):
     rating: int = Field(lt=5)
     review_text: str
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
-    updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    )
     user: Optional[User] = Relationship(back_populates="reviews")
     book: Optional[Book] = Relationship(back_populates="reviews")
 
     def __repr__(self):
         return f"Review {self.review_text} from {self.book_uid} by {self.user_uid}"
+
+
+class EmailOutbox(SQLModel, table=True):
+    __table_args__ = (
+        Index(
+            "ix_emailoutbox_pending",
+            "created_at",
+            postgresql_where=text("dispatched_at IS NULL"),
+        ),
+    )
+
+    uid: uuid.UUID = Field(
+        sa_column=Column(
+            pg.UUID,
+            primary_key=True,
+            unique=True,
+            nullable=False,
+            default=uuid.uuid4,
+        )
+    )
+    recipients: List[str] = Field(
+        sa_column=Column(pg.ARRAY(pg.VARCHAR), nullable=False)
+    )
+    subject: str
+    template_name: str
+    context: dict = Field(sa_column=Column(pg.JSONB, nullable=False))
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    dispatched_at: Optional[datetime] = Field(
+        sa_column=Column(pg.TIMESTAMP, nullable=True)
+    )
+
+    def __repr__(self):
+        return f"EmailOutbox {self.template_name} to {self.recipients}"
@@ -1,23 +1,156 @@
+import asyncio
+import time
+from typing import Any, Iterable, Sequence
 import redis.asyncio as redis
+from redis.asyncio.cluster import RedisCluster
+from redis.asyncio.sentinel import Sentinel
+from redis.exceptions import RedisClusterException, RedisError
 from src.config import Config
+from src.metrics import auth_blocklist_lookup_seconds, auth_blocklist_lookups
 
 JTI_EXPIRED = 3600
 
-redis_client = redis.from_url(Config.REDIS_URL)
+# cluster mode raises RedisClusterException, which is not a RedisError
+REDIS_ERRORS = (RedisError, RedisClusterException)
+
+
+def create_redis_client():
+    connection_options = {
+        "socket_timeout": Config.REDIS_SOCKET_TIMEOUT,
+        "socket_connect_timeout": Config.REDIS_SOCKET_CONNECT_TIMEOUT,
+        "health_check_interval": Config.REDIS_HEALTH_CHECK_INTERVAL,
+    }
+
+    if Config.REDIS_MODE == "cluster":
+        # max_connections applies per cluster node
+        return RedisCluster.from_url(
+            Config.REDIS_URL,
+            max_connections=Config.REDIS_MAX_CONNECTIONS,
+            **connection_options,
+        )
+
+    if Config.REDIS_MODE == "sentinel":
+        sentinels = []
+        for entry in Config.REDIS_SENTINELS:
+            host, port = entry.rsplit(":", 1)
+            sentinels.append((host, int(port)))
+
+        sentinel = Sentinel(sentinels, **connection_options)
+        return sentinel.master_for(
+            Config.REDIS_SENTINEL_MASTER,
+            max_connections=Config.REDIS_MAX_CONNECTIONS,
+        )
+
+    return redis.from_url(
+        Config.REDIS_URL,
+        max_connections=Config.REDIS_MAX_CONNECTIONS,
+        **connection_options,
+    )
+
+
+redis_client = create_redis_client()
+
+# deletes a lock only while it still holds the caller's token, so a holder
+# that outlived its timeout can't free a lock another process has since taken
+release_lock_script = redis_client.register_script(
+    """
+    if redis.call("GET", KEYS[1]) == ARGV[1] then
+        return redis.call("DEL", KEYS[1])
+    end
+    return 0
+    """
+)
+
+
+async def pipelined(commands: Iterable[Sequence[Any]]) -> list:
+    """Sends many commands in one round trip, or one per node on a cluster.
+
+    The pipeline is never transactional: RedisCluster refuses MULTI, and
+    without it the keys may span slots. Results come back in command order.
+    """
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for command in commands:
+            pipe.execute_command(*command)
+        return await pipe.execute()
 
 
 async def add_jti_to_blocklist(jti: str) -> None:
     await redis_client.set(name=jti, value="", ex=JTI_EXPIRED)
 
 
+async def add_jtis_to_blocklist(jtis: Iterable[str]) -> None:
+    """Revokes many tokens at once, such as every session of a user"""
+    await pipelined(("SET", jti, "", "EX", JTI_EXPIRED) for jti in jtis)
+
+
 async def token_in_blocklist(jti: str) -> bool:
+    start = time.perf_counter()
     result = await redis_client.get(jti)
-    return result is not None
+    auth_blocklist_lookup_seconds.observe(time.perf_counter() - start)
+
+    revoked = result is not None
+    auth_blocklist_lookups.labels(result="revoked" if revoked else "valid").inc()
+
+    return revoked
+
+
+async def tokens_in_blocklist(jtis: Sequence[str]) -> list[bool]:
+    results = await pipelined(("EXISTS", jti) for jti in jtis)
+    return [bool(result) for result in results]
 
 
 async def remove_from_blocklist(jti: str) -> None:
     await redis_client.delete(jti)
 
 
+async def reserve_email_send(
+    email: str, template_name: str, task_id: str, force: bool = False
+) -> str:
+    """Returns the id of the task that owns the dedup window for this email"""
+    key = f"email_dedup:{template_name}:{email.lower()}"
+    window = Config.EMAIL_DEDUP_WINDOW_MINUTES * 60
+
+    if await redis_client.set(name=key, value=task_id, ex=window, nx=not force):
+        return task_id
+
+    owner = await redis_client.get(key)
+    return owner.decode() if owner is not None else task_id
+
+
+async def mark_recent_write(user_uid: str) -> None:
+    await redis_client.set(
+        name=f"recent_write:{user_uid}",
+        value="",
+        ex=Config.DB_READ_YOUR_WRITES_SECONDS,
+    )
+
+
+async def has_recent_write(user_uid: str) -> bool:
+    result = await redis_client.get(f"recent_write:{user_uid}")
+    return result is not None
+
+
+async def release_lock(key: str, token: str) -> bool:
+    return bool(await release_lock_script(keys=[key], args=[token]))
+
+
+async def warm_up_redis(connections: int) -> None:
+    await asyncio.gather(*(redis_client.ping() for _ in range(connections)))
+
+
+def redis_pool_status() -> dict:
+    if Config.REDIS_MODE == "cluster":
+        nodes = redis_client.get_nodes()  # type: ignore
+        opened = sum(len(node._connections) for node in nodes)
+        idle = sum(len(node._free) for node in nodes)
+        return {"in_use": opened - idle, "idle": idle}
+
+    pool = redis_client.connection_pool
+    return {
+        "in_use": len(pool._in_use_connections),
+        "idle": len(pool._available_connections),
+    }
+
+
 async def close_redis_connection():
-    await redis_client.close()
+    await redis_client.aclose()
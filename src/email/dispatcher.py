@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import time
+import uuid
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Optional
+import aiosmtplib
+
+from src.celery_task import (
+    dispatch_email_chunks,
+    get_email_job_status,
+    send_email_task,
+)
+from src.config import Config
+from src.email.mail import render_email_template
+
+
+logger = logging.getLogger(__name__)
+
+
+class EmailDispatcher:
+    """Hands mail over for delivery.
+
+    send returns once the message is safe to forget: queued on the broker
+    for Celery, or delivered by the asyncio backend. The outbox relay only
+    marks a row dispatched after that, and a send that raises leaves the row
+    for the next pass.
+    """
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def send(
+        self,
+        message_id: str,
+        recipients: list[str],
+        subject: str,
+        template_name: str,
+        context: dict,
+    ) -> None:
+        raise NotImplementedError("Please override this method in child classes")
+
+    async def send_bulk(
+        self, recipients: list[str], subject: str, template_name: str, context: dict
+    ) -> str:
+        raise NotImplementedError("Please override this method in child classes")
+
+    async def get_job_status(self, job_id: str) -> Optional[dict]:
+        raise NotImplementedError("Please override this method in child classes")
+
+
+class CeleryEmailDispatcher(EmailDispatcher):
+    async def send(
+        self,
+        message_id: str,
+        recipients: list[str],
+        subject: str,
+        template_name: str,
+        context: dict,
+    ) -> None:
+        await asyncio.to_thread(
+            send_email_task.apply_async,  # type: ignore
+            args=[recipients, subject, template_name, context],
+            task_id=message_id,
+        )
+
+    # saving and restoring the group are blocking broker and result-backend
+    # round trips, so they run off the event loop
+    async def send_bulk(
+        self, recipients: list[str], subject: str, template_name: str, context: dict
+    ) -> str:
+        return await asyncio.to_thread(
+            dispatch_email_chunks, recipients, subject, template_name, context
+        )
+
+    async def get_job_status(self, job_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(get_email_job_status, job_id)
+
+
+class AsyncioEmailDispatcher(EmailDispatcher):
+    """Sends mail from bounded worker tasks inside the app process.
+
+    Job status lives in process memory, so it is only visible to the
+    process that accepted the bulk send, and finished jobs are forgotten
+    after EMAIL_ASYNC_JOB_TTL seconds.
+    """
+
+    def __init__(self, concurrency: int, queue_size: int, drain_timeout: float):
+        self.concurrency = concurrency
+        self.drain_timeout = drain_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.workers: list[asyncio.Task] = []
+        self.jobs: dict[str, dict] = {}
+        self.finished: dict[str, float] = {}  # job id to finish time, oldest first
+
+    async def start(self) -> None:
+        self.workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Email queue not drained on shutdown, %d messages dropped",
+                self.queue.qsize(),
+            )
+
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def send(
+        self,
+        message_id: str,
+        recipients: list[str],
+        subject: str,
+        template_name: str,
+        context: dict,
+    ) -> None:
+        delivered = asyncio.get_running_loop().create_future()
+        await self.queue.put(
+            (None, recipients, subject, template_name, context, delivered)
+        )
+
+        # raises the send error, or is cancelled with the caller
+        await delivered
+
+    async def send_bulk(
+        self, recipients: list[str], subject: str, template_name: str, context: dict
+    ) -> str:
+        self._evict_finished_jobs()
+
+        job_id = str(uuid.uuid4())
+        chunk_size = Config.MAIL_CHUNK_SIZE
+        chunks = [
+            recipients[i : i + chunk_size]
+            for i in range(0, len(recipients), chunk_size)
+        ]
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "total_chunks": len(chunks),
+            "completed_chunks": 0,
+            "failed_chunks": 0,
+            "sent_recipients": 0,
+            "finished": False,
+        }
+
+        for chunk in chunks:
+            await self.queue.put((job_id, chunk, subject, template_name, context, None))
+
+        return job_id
+
+    async def get_job_status(self, job_id: str) -> Optional[dict]:
+        return self.jobs.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, recipients, subject, template_name, context, delivered = (
+                await self.queue.get()
+            )
+            if delivered is not None and delivered.cancelled():
+                # the relay gave up waiting, so the row stays in the outbox
+                self.queue.task_done()
+                continue
+
+            error = None
+            try:
+                await self._send_with_retry(recipients, subject, template_name, context)
+            except Exception as e:
+                logger.exception(e)
+                error = e
+
+            self._record(job_id, 0 if error else len(recipients), failed=bool(error))
+            if delivered is not None and not delivered.done():
+                if error is None:
+                    delivered.set_result(None)
+                else:
+                    delivered.set_exception(error)
+            self.queue.task_done()
+
+    async def _send_with_retry(
+        self, recipients: list[str], subject: str, template_name: str, context: dict
+    ) -> None:
+        body = render_email_template(template_name, context)
+        message = create_smtp_message(recipients, subject, body)
+
+        for attempt in range(Config.MAIL_CHUNK_MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(2**attempt)
+            try:
+                await send_smtp_message(message)
+                return
+            except aiosmtplib.SMTPException as e:
+                if attempt == Config.MAIL_CHUNK_MAX_RETRIES:
+                    raise
+                logger.warning("Email send attempt %d failed: %s", attempt + 1, e)
+
+    def _record(self, job_id: Optional[str], sent: int, failed: bool) -> None:
+        job = self.jobs.get(job_id) if job_id else None
+        if job is None:
+            return
+
+        job["completed_chunks"] += 1
+        job["failed_chunks"] += int(failed)
+        job["sent_recipients"] += sent
+        job["finished"] = job["completed_chunks"] == job["total_chunks"]
+        if job["finished"]:
+            self.finished[job["job_id"]] = time.monotonic()
+
+    def _evict_finished_jobs(self) -> None:
+        cutoff = time.monotonic() - Config.EMAIL_ASYNC_JOB_TTL
+        for job_id, finished_at in list(self.finished.items()):
+            if finished_at > cutoff:
+                break
+            del self.finished[job_id]
+            del self.jobs[job_id]
+
+
+def create_smtp_message(
+    recipients: list[str], subject: str, body: str
+) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((Config.MAIL_FROM_NAME, Config.MAIL_FROM))
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    message.set_content(body, subtype="html")
+
+    return message
+
+
+async def send_smtp_message(message: EmailMessage) -> None:
+    if Config.MAIL_SUPPRESS_SEND:
+        return
+
+    await aiosmtplib.send(
+        message,
+        hostname=Config.MAIL_SERVER,
+        port=Config.MAIL_PORT,
+        username=Config.MAIL_USERNAME if Config.USE_CREDENTIALS else None,
+        password=Config.MAIL_PASSWORD if Config.USE_CREDENTIALS else None,
+        use_tls=Config.MAIL_SSL_TLS,
+        start_tls=Config.MAIL_STARTTLS,
+        validate_certs=Config.VALIDATE_CERTS,
+    )
+
+
+def create_email_dispatcher() -> EmailDispatcher:
+    if Config.EMAIL_BACKEND == "asyncio":
+        return AsyncioEmailDispatcher(
+            concurrency=Config.EMAIL_ASYNC_CONCURRENCY,
+            queue_size=Config.EMAIL_ASYNC_QUEUE_SIZE,
+            drain_timeout=Config.EMAIL_ASYNC_DRAIN_TIMEOUT,
+        )
+
+    return CeleryEmailDispatcher()
+
+
+email_dispatcher = create_email_dispatcher()
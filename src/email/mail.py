@@ -1,8 +1,13 @@
+import os
+import re
 from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
 
 from src.config import Config
 
 
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+
 mail_config = ConnectionConfig(
     MAIL_USERNAME=Config.MAIL_USERNAME,
     MAIL_PASSWORD=Config.MAIL_PASSWORD,
@@ -14,11 +19,40 @@ mail_config = ConnectionConfig(
     MAIL_SSL_TLS=Config.MAIL_SSL_TLS,
     USE_CREDENTIALS=Config.USE_CREDENTIALS,
     VALIDATE_CERTS=Config.VALIDATE_CERTS,
+    SUPPRESS_SEND=int(Config.MAIL_SUPPRESS_SEND),
 )
 
 mail = FastMail(mail_config)
 
 
+class MinifyingLoader(FileSystemLoader):
+    """Collapses whitespace between tags before the template is compiled"""
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        source = re.sub(r">\s+<", "><", source.strip())
+
+        return source, filename, uptodate
+
+
+template_env = Environment(
+    loader=MinifyingLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    cache_size=-1,
+)
+
+# compiled once per process; jinja keeps the static markup as string constants
+# so each render only evaluates the dynamic expressions
+email_templates: dict[str, Template] = {
+    name: template_env.get_template(name) for name in template_env.list_templates()
+}
+
+
+def render_email_template(template_name: str, context: dict) -> str:
+    return email_templates[template_name].render(context)
+
+
 def create_message(recipients: list[str], subject: str, body: str) -> MessageSchema:
     message = MessageSchema(
         recipients=recipients,
@@ -0,0 +1,92 @@
+"""Drains the email outbox to Celery.
+
+Run with: python -m src.email.relay
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select, delete
+
+from src.config import Config
+from src.db.main import async_session
+from src.db.models import EmailOutbox
+from src.email.dispatcher import EmailDispatcher, email_dispatcher
+
+
+logger = logging.getLogger(__name__)
+
+
+async def relay_batch(session: AsyncSession, dispatcher: EmailDispatcher) -> int:
+    statement = (
+        select(EmailOutbox)
+        .where(EmailOutbox.dispatched_at == None)  # noqa: E711
+        .order_by(EmailOutbox.created_at)
+        .limit(Config.EMAIL_OUTBOX_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.execute(statement)
+    rows = result.scalars().all()
+    if not rows:
+        return 0
+
+    # a row is only marked once its send has completed, so mail that was
+    # never handed over is sent again on a later pass (at-least-once)
+    results = await asyncio.gather(
+        *(
+            dispatcher.send(
+                str(row.uid),
+                row.recipients,
+                row.subject,
+                row.template_name,
+                row.context,
+            )
+            for row in rows
+        ),
+        return_exceptions=True,
+    )
+    for row, result in zip(rows, results):
+        if isinstance(result, Exception):
+            logger.warning("Outbox email %s not dispatched: %s", row.uid, result)
+        else:
+            row.dispatched_at = datetime.now()
+
+    await session.commit()
+
+    return len(rows)
+
+
+async def purge_dispatched(session: AsyncSession) -> None:
+    cutoff = datetime.now() - timedelta(hours=Config.EMAIL_OUTBOX_RETENTION_HOURS)
+    statement = delete(EmailOutbox).where(EmailOutbox.dispatched_at < cutoff)
+    await session.execute(statement)
+    await session.commit()
+
+
+async def run_relay(dispatcher: EmailDispatcher = email_dispatcher) -> None:
+    while True:
+        try:
+            async with async_session() as session:
+                relayed = await relay_batch(session, dispatcher)
+                if relayed == 0:
+                    await purge_dispatched(session)
+        except Exception as e:
+            logger.exception(e)
+            relayed = 0
+
+        if relayed < Config.EMAIL_OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(Config.EMAIL_OUTBOX_POLL_INTERVAL)
+
+
+async def main() -> None:
+    await email_dispatcher.start()
+    try:
+        await run_relay()
+    finally:
+        await email_dispatcher.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
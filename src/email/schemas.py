@@ -1,9 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
 
 
 class EmailSchema(BaseModel):
-    addresses: List[str]
+    addresses: List[str] = Field(min_length=1)
 
 
 class PasswordResetRequestSchema(BaseModel):
@@ -0,0 +1,41 @@
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import EmailOutbox
+from src.db.redis import reserve_email_send
+from src.metrics import email_sends_enqueued, email_sends_suppressed
+
+
+class EmailOutboxService:
+    async def add_email(
+        self,
+        email: str,
+        subject: str,
+        template_name: str,
+        context: dict,
+        session: AsyncSession,
+    ) -> uuid.UUID:
+        """Stages an outbox row in the caller's transaction; the caller commits"""
+        outbox_uid = uuid.uuid4()
+        owner_uid = await reserve_email_send(email, template_name, str(outbox_uid))
+
+        if owner_uid != str(outbox_uid):
+            if await session.get(EmailOutbox, owner_uid) is not None:
+                email_sends_suppressed.labels(template=template_name).inc()
+                return uuid.UUID(owner_uid)
+
+            # the owning transaction never committed, take the window over
+            await reserve_email_send(email, template_name, str(outbox_uid), force=True)
+
+        session.add(
+            EmailOutbox(
+                uid=outbox_uid,
+                recipients=[email],
+                subject=subject,
+                template_name=template_name,
+                context=context,
+            )
+        )
+        email_sends_enqueued.labels(template=template_name).inc()
+
+        return outbox_uid
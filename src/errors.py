@@ -1,7 +1,7 @@
 from typing import Any, Callable
 from fastapi import FastAPI, status
 from fastapi.requests import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 
 
 class BookException(Exception):
@@ -94,11 +94,17 @@ class PasswordResetFailed(BookException):
     pass
 
 
+class EmailJobNotFound(BookException):
+    """Email job Not found"""
+
+    pass
+
+
 def create_exception_handler(
     status_code: int, handler_detail: Any
-) -> Callable[[Request, Exception], JSONResponse]:
+) -> Callable[[Request, Exception], ORJSONResponse]:
     async def exception_handler(request: Request, exc: BookException):
-        return JSONResponse(content=handler_detail, status_code=status_code)
+        return ORJSONResponse(content=handler_detail, status_code=status_code)
 
     return exception_handler  # type: ignore
 
@@ -258,9 +264,20 @@ def register_error_handlers(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        EmailJobNotFound,
+        create_exception_handler(
+            status_code=status.HTTP_404_NOT_FOUND,
+            handler_detail={
+                "detail": "The requested email job was not found.",
+                "error_code": "email_job_not_found",
+            },
+        ),
+    )
+
     @app.exception_handler(500)
     async def internal_server_error_handler(request, exc):
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={
                 "detail": "An unexpected error occurred. Please try again later.",
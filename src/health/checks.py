@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from src.celery_task import celery_app
+from src.config import Config
+from src.db.main import async_engine, replica_engines
+from src.db.redis import redis_client
+
+
+class CachedCheck:
+    """Runs a check at most once per TTL, concurrent probes share the result"""
+
+    def __init__(self, check: Callable[[], Awaitable[dict]], ttl: float):
+        self.check = check
+        self.ttl = ttl
+        self.result: dict = {}
+        self.expires_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def get(self) -> dict:
+        if time.monotonic() < self.expires_at:
+            return self.result
+
+        async with self.lock:
+            if time.monotonic() >= self.expires_at:
+                self.result = await self.check()
+                self.expires_at = time.monotonic() + self.ttl
+
+        return self.result
+
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    capacity = pool.size() + Config.DB_MAX_OVERFLOW
+    checked_out = pool.checkedout()
+
+    return {
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "utilisation": round(checked_out / capacity, 3) if capacity else 1.0,
+        "healthy": checked_out < capacity,
+    }
+
+
+async def check_database() -> dict:
+    pools = {"primary": pool_status(async_engine)}
+    for index, engine in enumerate(replica_engines):
+        pools[f"replica_{index}"] = pool_status(engine)
+
+    return {
+        "pools": pools,
+        "healthy": all(pool["healthy"] for pool in pools.values()),
+    }
+
+
+async def check_redis() -> dict:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(
+            redis_client.ping(), timeout=Config.HEALTH_CHECK_TIMEOUT
+        )
+    except Exception as e:
+        return {"healthy": False, "error": type(e).__name__}
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    return {"healthy": True, "latency_ms": round(latency_ms, 2)}
+
+
+def ping_broker() -> None:
+    with celery_app.connection_for_write() as connection:
+        connection.ensure_connection(max_retries=0)
+
+
+async def check_broker() -> dict:
+    if Config.EMAIL_BACKEND != "celery":
+        return {"healthy": True, "enabled": False}
+
+    try:
+        await asyncio.wait_for(
+            asyncio.to_thread(ping_broker), timeout=Config.HEALTH_CHECK_TIMEOUT
+        )
+    except Exception as e:
+        return {"healthy": False, "enabled": True, "error": type(e).__name__}
+
+    return {"healthy": True, "enabled": True}
+
+
+database_check = CachedCheck(check_database, ttl=Config.HEALTH_CHECK_TTL)
+redis_check = CachedCheck(check_redis, ttl=Config.HEALTH_CHECK_TTL)
+broker_check = CachedCheck(check_broker, ttl=Config.HEALTH_CHECK_TTL)
@@ -0,0 +1,54 @@
+import asyncio
+from fastapi import APIRouter, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from src.auth.policy import public_route
+from src.db.redis import redis_pool_status
+from src.health.checks import broker_check, database_check, redis_check
+from src.metrics import get_registry, redis_pool_connections
+
+
+health_router = APIRouter()
+
+
+@health_router.get("/healthz")
+@public_route
+async def liveness():
+    return ORJSONResponse(status_code=status.HTTP_200_OK, content={"status": "ok"})
+
+
+@health_router.get("/readyz")
+@public_route
+async def readiness(request: Request):
+    database, redis, broker = await asyncio.gather(
+        database_check.get(), redis_check.get(), broker_check.get()
+    )
+
+    # the broker only carries email, so its outage is reported without
+    # taking the API out of rotation
+    ready = request.app.state.ready and database["healthy"] and redis["healthy"]
+
+    return ORJSONResponse(
+        status_code=(
+            status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+        content={
+            "status": "ready" if ready else "not_ready",
+            "warmed_up": request.app.state.ready,
+            "database": database,
+            "redis": redis,
+            "broker": broker,
+        },
+    )
+
+
+@health_router.get("/metrics", include_in_schema=False)
+@public_route
+async def metrics():
+    for state, connections in redis_pool_status().items():
+        redis_pool_connections.labels(state=state).set(connections)
+
+    return Response(
+        content=generate_latest(get_registry()), media_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,361 @@
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Mapping, Optional
+
+import orjson
+from fastapi import Request, Response, status
+from fastapi.responses import ORJSONResponse
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.auth.dependencies import RoleChecker
+from src.auth.policy import RoutePolicy
+from src.auth.services import AuthService
+from src.auth.utils import decode_token
+from src.config import Config
+from src.db.main import async_read_session
+from src.db.redis import (
+    REDIS_ERRORS,
+    pipelined,
+    redis_client,
+    release_lock,
+    token_in_blocklist,
+)
+from src.errors import BookException, InvalidToken, UserNotFound
+
+
+logger = logging.getLogger(__name__)
+
+auth_service = AuthService()
+
+Authorize = Callable[[], Awaitable[Optional[Response]]]
+
+
+def idempotent(endpoint: Callable) -> Callable:
+    """Lets clients retry an endpoint safely with an Idempotency-Key header.
+
+    Apply it below the router decorator so the flag is set before the route
+    is registered.
+    """
+    endpoint.__idempotent__ = True  # type: ignore
+    return endpoint
+
+
+def is_idempotent_route(route: BaseRoute) -> bool:
+    return isinstance(route, APIRoute) and getattr(
+        route.endpoint, "__idempotent__", False
+    )
+
+
+def role_checkers(route: APIRoute) -> list[RoleChecker]:
+    return [
+        dependency.call
+        for dependency in route.dependant.dependencies
+        if isinstance(dependency.call, RoleChecker)
+    ]
+
+
+def decode_access_token(authorization: str) -> Optional[dict]:
+    """Scopes keys to the token's user, so one user can't replay another's.
+
+    Only the signature and expiry are checked here; a request whose token
+    fails the full check still reaches the route and is rejected there.
+    Replays repeat that check in authorize_replay.
+    """
+    _, _, token = authorization.partition(" ")
+    token_data = decode_token(token)
+    if token_data is None or token_data.get("refresh"):
+        return None
+
+    return token_data
+
+
+async def authorize_replay(token_data: dict, checkers: list[RoleChecker]) -> None:
+    """The route's own token and role checks, which raise a BookException"""
+    if await token_in_blocklist(token_data["jti"]):
+        raise InvalidToken()
+
+    async with async_read_session() as session:
+        user = await auth_service.get_user_by_email(
+            token_data["user"]["email"], session
+        )
+    if user is None:
+        raise UserNotFound()
+
+    for checker in checkers:
+        checker(user)
+
+
+def error_response(status_code: int, message: str, error_code: str) -> ORJSONResponse:
+    return ORJSONResponse(
+        status_code=status_code,
+        content={"message": message, "error_code": error_code},
+    )
+
+
+class IdempotencyMiddleware:
+    """Replays the stored response for a repeated Idempotency-Key.
+
+    The first request with a key takes a Redis lock and runs; its response
+    is stored for IDEMPOTENCY_TTL seconds unless it is a 5xx, which leaves
+    the key free for a retry. Duplicates that arrive while it runs poll for
+    the stored response, for up to IDEMPOTENCY_WAIT_TIMEOUT seconds. Keys
+    are scoped to the user and route, and reusing one with a different body
+    is rejected.
+
+    A replay skips the route and its writes, but not its authorization: the
+    token blocklist and the route's RoleChecker run first, and a rejection
+    is answered by the app's own exception handlers.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        routes: list[BaseRoute],
+        exception_handlers: Mapping,
+    ) -> None:
+        self.app = app
+        self.route_policy = RoutePolicy.from_routes(routes, include=is_idempotent_route)
+        self.routes = [
+            (route, role_checkers(route))
+            for route in routes
+            if isinstance(route, APIRoute) and is_idempotent_route(route)
+        ]
+        self.exception_handlers = exception_handlers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.route_policy.matches(
+            scope["method"], scope["path"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        token_data = decode_access_token(headers.get("authorization", ""))
+        if idempotency_key is None or token_data is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not 0 < len(idempotency_key) <= Config.IDEMPOTENCY_KEY_MAX_LENGTH:
+            response = error_response(
+                status.HTTP_400_BAD_REQUEST,
+                "Idempotency-Key must be 1 to "
+                f"{Config.IDEMPOTENCY_KEY_MAX_LENGTH} characters long",
+                "invalid_idempotency_key",
+            )
+            await response(scope, receive, send)
+            return
+
+        # the body is read up front to fingerprint it, then handed on as is
+        body = await read_body(receive)
+        fingerprint = hashlib.sha256(body).hexdigest()
+
+        async def replay_body() -> Message:
+            nonlocal body
+            if body is None:
+                return await receive()
+
+            message = {"type": "http.request", "body": body, "more_body": False}
+            body = None
+            return message
+
+        checkers = next(
+            (
+                checkers
+                for route, checkers in self.routes
+                if self.full_match(route, scope)
+            ),
+            [],
+        )
+
+        async def authorize() -> Optional[Response]:
+            try:
+                await authorize_replay(token_data, checkers)
+            except BookException as e:
+                handler = self.exception_handlers[type(e)]
+                return await handler(Request(scope), e)
+
+            return None
+
+        user_uid = token_data["user"]["user_uid"]
+        request = IdempotentRequest(
+            f"{user_uid}:{scope['method']}:{scope['path']}:{idempotency_key}",
+            fingerprint,
+            authorize,
+        )
+        try:
+            await request.handle(scope, replay_body, send, self.app)
+        except REDIS_ERRORS as e:
+            # without Redis the request still runs, just without the guarantee
+            logger.warning("Idempotency check failed: %s", e)
+            if request.started:
+                raise
+            await self.app(scope, replay_body, send)
+
+    @staticmethod
+    def full_match(route: APIRoute, scope: Scope) -> bool:
+        match, _ = route.matches(scope)
+        return match == Match.FULL
+
+
+async def read_body(receive: Receive) -> bytes:
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        more_body = message.get("more_body", False)
+
+    return b"".join(chunks)
+
+
+class IdempotentRequest:
+    def __init__(self, key: str, fingerprint: str, authorize: Authorize) -> None:
+        self.key = f"idempotency:{key}"
+        self.lock_key = f"idempotency_lock:{key}"
+        self.fingerprint = fingerprint
+        self.authorize = authorize
+        # the lock holds the fingerprint for waiters to compare, and a token
+        # of this request so it is only ever released by its holder
+        self.lock_value = f"{fingerprint}:{uuid.uuid4().hex}"
+        self.started = False
+
+    async def handle(
+        self, scope: Scope, receive: Receive, send: Send, app: ASGIApp
+    ) -> None:
+        deadline = time.monotonic() + Config.IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            stored = await redis_client.hgetall(self.key)  # type: ignore
+            if stored:
+                await self.replay(stored, scope, receive, send)
+                return
+
+            locked = await redis_client.set(
+                name=self.lock_key,
+                value=self.lock_value,
+                ex=Config.IDEMPOTENCY_LOCK_TIMEOUT,
+                nx=True,
+            )
+            if locked:
+                await self.run(scope, receive, send, app)
+                return
+
+            # another request holds the key; it is lost if the lock expired
+            # between the two calls, which the next loop retries
+            holder = await redis_client.get(self.lock_key)
+            if holder is not None and holder.decode().partition(":")[0] != (
+                self.fingerprint
+            ):
+                await self.mismatch(scope, receive, send)
+                return
+
+            if time.monotonic() >= deadline:
+                response = error_response(
+                    status.HTTP_409_CONFLICT,
+                    "A request with this Idempotency-Key is still in progress",
+                    "idempotency_key_in_progress",
+                )
+                await response(scope, receive, send)
+                return
+
+            await asyncio.sleep(Config.IDEMPOTENCY_POLL_INTERVAL)
+
+    async def run(
+        self, scope: Scope, receive: Receive, send: Send, app: ASGIApp
+    ) -> None:
+        # the holder before us may have stored its response and unlocked
+        # between our read and our lock
+        stored = await redis_client.hgetall(self.key)  # type: ignore
+        if stored:
+            await self.unlock()
+            await self.replay(stored, scope, receive, send)
+            return
+
+        start: Message = {}
+        chunks = []
+
+        async def capture(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        self.started = True
+        try:
+            await app(scope, receive, capture)
+            if start and start["status"] < status.HTTP_500_INTERNAL_SERVER_ERROR:
+                await self.store(start, b"".join(chunks))
+        finally:
+            await self.unlock()
+
+    async def store(self, start: Message, body: bytes) -> None:
+        entry = {
+            "fingerprint": self.fingerprint,
+            "status": start["status"],
+            "headers": orjson.dumps(
+                [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in start["headers"]
+                ]
+            ),
+            "body": body,
+        }
+        fields = [item for pair in entry.items() for item in pair]
+        try:
+            await pipelined(
+                [
+                    ("HSET", self.key, *fields),
+                    ("EXPIRE", self.key, Config.IDEMPOTENCY_TTL),
+                ]
+            )
+        except REDIS_ERRORS as e:
+            logger.warning("Idempotency write failed: %s", e)
+
+    async def unlock(self) -> None:
+        try:
+            await release_lock(self.lock_key, self.lock_value)
+        except REDIS_ERRORS as e:
+            # the lock expires after IDEMPOTENCY_LOCK_TIMEOUT anyway
+            logger.warning("Idempotency unlock failed: %s", e)
+
+    async def replay(
+        self, stored: dict, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if stored[b"fingerprint"].decode() != self.fingerprint:
+            await self.mismatch(scope, receive, send)
+            return
+
+        rejection = await self.authorize()
+        if rejection is not None:
+            await rejection(scope, receive, send)
+            return
+
+        headers = [
+            (name.encode("latin-1"), value.encode("latin-1"))
+            for name, value in orjson.loads(stored[b"headers"])
+        ]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send(
+            {
+                "type": "http.response.start",
+                "status": int(stored[b"status"]),
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": stored[b"body"]})
+
+    async def mismatch(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = error_response(
+            status.HTTP_422_UNPROCESSABLE_ENTITY,
+            "Idempotency-Key was already used with a different request body",
+            "idempotency_key_reused",
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import signal
+import threading
+import uuid
+from fastapi import FastAPI
+
+from src.auth.services import AuthService
+from src.books.services import BookService
+from src.config import Config
+from src.db.main import async_read_session, warm_up_db
+from src.db.redis import warm_up_redis
+from src.reviews.service import ReviewService
+
+
+logger = logging.getLogger(__name__)
+
+
+async def warm_up_queries() -> None:
+    """Runs the hot lookups once so their compiled forms are cached"""
+    missing_uid = str(uuid.UUID(int=0))
+    async with async_read_session() as session:
+        await BookService().get_book(missing_uid, session)
+        await ReviewService().get_review(missing_uid, session)
+        await AuthService().get_user_by_email("", session)
+
+
+async def warm_up(app: FastAPI) -> None:
+    await warm_up_db(Config.DB_WARMUP_CONNECTIONS)
+    await warm_up_redis(Config.REDIS_WARMUP_CONNECTIONS)
+    await warm_up_queries()
+    app.state.ready = True
+
+
+async def warm_up_until_ready(app: FastAPI) -> None:
+    """Keeps retrying in the background when a dependency was down at startup"""
+    while not app.state.ready:
+        await asyncio.sleep(1)
+        try:
+            await warm_up(app)
+        except Exception as e:
+            logger.warning("Warm-up failed, retrying: %s", e)
+
+
+def drain_on_sigterm(app: FastAPI) -> None:
+    """Fails readiness on SIGTERM, then hands the signal on after a delay.
+
+    uvicorn stops accepting connections as soon as it handles SIGTERM, and
+    runs lifespan shutdown only after the in-flight requests finish, so
+    readiness has to fail before that. For SHUTDOWN_DRAIN_DELAY seconds
+    /readyz answers 503 while requests are still served, which gives load
+    balancers time to stop routing here. Call it from lifespan startup,
+    after uvicorn has installed its own handlers.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    uvicorn_handler = signal.getsignal(signal.SIGTERM)
+    if not callable(uvicorn_handler):
+        return
+
+    loop = asyncio.get_running_loop()
+
+    def handle_sigterm(signum, frame) -> None:
+        # a second SIGTERM goes straight to uvicorn
+        signal.signal(signal.SIGTERM, uvicorn_handler)
+        app.state.ready = False
+        logger.info(
+            "SIGTERM received, readiness off, shutting down in %.1fs",
+            Config.SHUTDOWN_DRAIN_DELAY,
+        )
+        loop.call_soon_threadsafe(
+            loop.call_later, Config.SHUTDOWN_DRAIN_DELAY, uvicorn_handler, signum, frame
+        )
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
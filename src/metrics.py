@@ -0,0 +1,134 @@
+import os
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+)
+
+
+email_sends_enqueued = Counter(
+    "email_sends_enqueued_total",
+    "Emails written to the outbox for delivery",
+    ["template"],
+)
+
+email_sends_suppressed = Counter(
+    "email_sends_suppressed_total",
+    "Emails skipped because an identical send is inside its dedup window",
+    ["template"],
+)
+
+celery_task_wait_seconds = Histogram(
+    "celery_task_wait_seconds",
+    "Time between publishing a task and a worker starting it",
+    ["task", "queue"],
+)
+
+celery_task_duration_seconds = Histogram(
+    "celery_task_duration_seconds",
+    "Task execution time on the worker",
+    ["task", "state"],
+)
+
+celery_task_retries = Counter(
+    "celery_task_retries_total",
+    "Task retries requested by the worker",
+    ["task"],
+)
+
+email_stage_duration_seconds = Histogram(
+    "email_stage_duration_seconds",
+    "Time spent rendering and sending an email from a task",
+    ["stage"],
+)
+
+celery_queue_depth = Gauge(
+    "celery_queue_depth",
+    "Messages waiting in the broker, sampled by the worker",
+    ["queue"],
+    multiprocess_mode="mostrecent",
+)
+
+db_pool_checkout_wait_seconds = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the database pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30),
+)
+
+access_log_records_dropped = Counter(
+    "access_log_records_dropped_total",
+    "Access log records dropped because the log queue was full",
+)
+
+http_requests_total = Counter(
+    "http_requests_total",
+    "Requests handled, by route template",
+    ["method", "route", "status"],
+)
+
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to finishing its response",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight",
+    "Requests currently inside a route handler",
+    ["route"],
+    multiprocess_mode="livesum",
+)
+
+db_pool_connections_checked_out = Gauge(
+    "db_pool_connections_checked_out",
+    "Connections currently checked out of the database pool",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+db_pool_capacity = Gauge(
+    "db_pool_capacity",
+    "Connections the database pool may open, including overflow",
+    ["pool"],
+    multiprocess_mode="livesum",
+)
+
+redis_pool_connections = Gauge(
+    "redis_pool_connections",
+    "Redis pool connections by state, sampled when metrics are served",
+    ["state"],
+    multiprocess_mode="liveall",
+)
+
+auth_blocklist_lookups = Counter(
+    "auth_blocklist_lookups_total",
+    "Token blocklist lookups made while authenticating requests",
+    ["result"],
+)
+
+auth_blocklist_lookup_seconds = Histogram(
+    "auth_blocklist_lookup_seconds",
+    "Redis round trip for a token blocklist lookup",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+)
+
+
+def get_registry() -> CollectorRegistry:
+    """Aggregates every process' samples when PROMETHEUS_MULTIPROC_DIR is set"""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+
+    return registry
+
+
+def mark_process_dead() -> None:
+    """Drops this process' live gauges from the multiprocess aggregate"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(os.getpid())
@@ -1,56 +1,271 @@
-import re
 from fastapi import FastAPI, status
-from fastapi.requests import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.routing import BaseRoute, Route
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from prometheus_client import Counter, Gauge, Histogram
 import time
 import logging
+from typing import Iterable, Optional
+
+from src.access_log import log_request
+from src.auth.policy import RoutePolicy
+from src.compression import CompressionMiddleware
+from src.config import Config
+from src.db.instrumentation import QueryStats, query_stats
+from src.idempotency import IdempotencyMiddleware
+from src.metrics import (
+    http_request_duration_seconds,
+    http_requests_in_flight,
+    http_requests_total,
+)
 
 
 logger = logging.getLogger("uvicorn.access")
 logger.disabled = True  # Disable default logging to avoid duplicate logs
 
+sql_logger = logging.getLogger(__name__)
 
-def register_middleware(app: FastAPI):
-    @app.middleware("http")
-    async def custom_logging(request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        duration = time.time() - start_time
-        message = f"{request.client.host}:{request.client.port} - {request.method} {request.url.path} - {response.status_code} in {duration}s"  # type: ignore
-        print(message)  # Print to console
-        return response
-
-    @app.middleware("http")
-    async def authorization_middleware(request: Request, call_next):
-        public_path_patterns = [
-            re.compile(r"^/api/v\d+/auth/signup/?$"),
-            re.compile(r"^/api/v\d+/auth/login/?$"),
-            re.compile(r"^/api/v\d+/auth/status/?$"),
-            re.compile(r"^/api/v\d+/auth/refresh_token/?$"),
-            re.compile(r"^/api/v\d+/auth/send_email/?$"),
-            re.compile(r"^/api/v\d+/auth/password_reset/?$"),
-            re.compile(r"^/api/v\d+/auth/verify_email/[^/]+/?$"),
-            re.compile(r"^/api/v\d+/auth/password_reset_confirm/[^/]+/?$"),
-            re.compile(r"^/docs/?.*"),
-            re.compile(r"^/openapi\.json/?$"),
-            re.compile(r"^/redoc/?.*"),
-        ]
-
-        path = request.url.path
-        if any(pattern.match(path) for pattern in public_path_patterns):
-            return await call_next(request)
-        elif "Authorization" not in request.headers:
-            return JSONResponse(
+
+def check_query_budget(stats: QueryStats) -> list[str]:
+    violations = []
+    if Config.SQL_QUERY_BUDGET and stats.count > Config.SQL_QUERY_BUDGET:
+        violations.append(
+            f"{stats.count} queries exceed the budget of {Config.SQL_QUERY_BUDGET}"
+        )
+
+    if Config.SQL_REPEATED_STATEMENT_LIMIT:
+        statement, repeats = stats.most_repeated()
+        if repeats > Config.SQL_REPEATED_STATEMENT_LIMIT:
+            violations.append(f"statement ran {repeats} times: {statement}")
+
+    return violations
+
+
+def server_timing(stats: QueryStats) -> str:
+    return f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"'
+
+
+def route_template(scope: Scope) -> Optional[str]:
+    """Template of the matched route, read after the app has handled the request"""
+    # the router copies its match into this scope; only API routes carry the
+    # route itself, the docs routes have literal paths
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        return scope["path"]
+
+    return None
+
+
+class SQLInstrumentationMiddleware:
+    """Collects per-request query stats and reports them in Server-Timing.
+
+    Yield dependencies exit before the response starts, so the stats are
+    complete by the time the start message passes through here.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        replaced = False
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal replaced
+            if replaced:
+                return  # drop the body of the response we replaced
+
+            if message["type"] == "http.response.start":
+                violations = check_query_budget(stats)
+                for violation in violations:
+                    sql_logger.warning(
+                        "%s %s: %s", scope["method"], scope["path"], violation
+                    )
+
+                if violations and Config.SQL_BUDGET_MODE == "fail":
+                    replaced = True
+                    response = ORJSONResponse(
+                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                        content={
+                            "message": "Request exceeded its SQL query budget",
+                            "error_code": "query_budget_exceeded",
+                            "violations": violations,
+                        },
+                        headers={"Server-Timing": server_timing(stats)},
+                    )
+                    await response(scope, receive, send)
+                    return
+
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(stats))
+
+            await send(message)
+
+        token = query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            query_stats.reset(token)
+
+
+class LoggingMiddleware:
+    """Structured access log keyed by route template, see src.access_log"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start_time
+            log_request(scope, route_template(scope), status_code, duration)
+
+
+class MetricsMiddleware:
+    """Request counts and latency by route template.
+
+    Labelled children are cached per method, route and status so a request
+    costs two dict lookups on top of the metric updates themselves.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.counters: dict[tuple, Counter] = {}
+        self.histograms: dict[tuple, Histogram] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start_time
+            # raw paths of unmatched requests would make the label unbounded
+            route = route_template(scope) or "unmatched"
+            self.observe(scope["method"], route, status_code, duration)
+
+    def observe(self, method: str, route: str, status_code: int, duration: float):
+        key = (method, route)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = http_request_duration_seconds.labels(method, route)
+            self.histograms[key] = histogram
+        histogram.observe(duration)
+
+        key = (method, route, status_code)
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = http_requests_total.labels(method, route, status_code)
+            self.counters[key] = counter
+        counter.inc()
+
+
+def count_route_in_flight(app: ASGIApp, in_flight: Gauge) -> ASGIApp:
+    async def handle(scope: Scope, receive: Receive, send: Send) -> None:
+        in_flight.inc()
+        try:
+            await app(scope, receive, send)
+        finally:
+            in_flight.dec()
+
+    return handle
+
+
+def instrument_routes(routes: Iterable[BaseRoute]) -> None:
+    """Wraps each route's handler so in-flight requests are gauged per template.
+
+    The route is only known once the router has matched it, so the gauge
+    lives on the route rather than in a middleware.
+    """
+    for route in routes:
+        if isinstance(route, Route):
+            in_flight = http_requests_in_flight.labels(route.path)
+            route.app = count_route_in_flight(route.app, in_flight)
+
+
+class AuthorizationMiddleware:
+    def __init__(self, app: ASGIApp, route_policy: RoutePolicy) -> None:
+        self.app = app
+        self.route_policy = route_policy
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.route_policy.matches(
+            scope["method"], scope["path"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        # ASGI servers lowercase header names
+        if not any(name == b"authorization" for name, _ in scope["headers"]):
+            response = ORJSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={
                     "message": "Authorization header is missing",
                     "error_code": "missing_authorization_header",
                 },
             )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+
+def register_middleware(app: FastAPI):
+    # each add_middleware call wraps the previous ones, so the first one added
+    # is the innermost
+    # inside compression so stored bodies are uncompressed, and inside SQL
+    # instrumentation so a replay shows that it ran no queries
+    app.add_middleware(
+        IdempotencyMiddleware,
+        routes=app.routes,
+        exception_handlers=app.exception_handlers,
+    )
+    app.add_middleware(CompressionMiddleware)
+    app.add_middleware(SQLInstrumentationMiddleware)
+    app.add_middleware(LoggingMiddleware)
+
+    # routers are included before this runs, so the table covers every route
+    app.add_middleware(
+        AuthorizationMiddleware, route_policy=RoutePolicy.from_routes(app.routes)
+    )
 
-        return await call_next(request)
+    # outside authorization so rejected requests are counted too
+    instrument_routes(app.routes)
+    app.add_middleware(MetricsMiddleware)
 
     app.add_middleware(
         CORSMiddleware,
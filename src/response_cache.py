@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable, Iterable, Optional
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+from src.conditional import conditional_response
+from src.config import Config
+from src.db.redis import REDIS_ERRORS, pipelined, redis_client, release_lock
+
+
+logger = logging.getLogger(__name__)
+
+# serialized body, ETag and Last-Modified, computed together so they match
+CachedBody = tuple[bytes, Optional[str], Optional[datetime]]
+
+# loaders return the body and the surrogate keys of everything it shows
+Loader = Callable[[], Awaitable[tuple[CachedBody, list[str]]]]
+
+
+def response_cache_key(request: Request, role: str) -> str:
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"response_cache:{role}:{request.url.path}?{query}"
+
+
+def surrogate_set_key(surrogate_key: str) -> str:
+    return f"response_cache_tag:{surrogate_key}"
+
+
+def encode_cached_body(cached: CachedBody) -> dict:
+    body, etag, last_modified = cached
+    return {
+        "body": body,
+        "etag": etag or "",
+        "last_modified": last_modified.isoformat() if last_modified else "",
+    }
+
+
+def decode_cached_body(entry: dict) -> CachedBody:
+    last_modified = entry[b"last_modified"].decode()
+    return (
+        entry[b"body"],
+        entry[b"etag"].decode() or None,
+        datetime.fromisoformat(last_modified) if last_modified else None,
+    )
+
+
+async def cached_body_response(
+    request: Request, cached: CachedBody, headers: dict
+) -> Response:
+    """Answers 304 from the body's own validators, else sends the body"""
+    body, etag, last_modified = cached
+
+    async def respond():
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    if etag is None or last_modified is None:  # an empty listing
+        return await respond()
+
+    return await conditional_response(request, etag, last_modified, respond)
+
+
+async def cached_response(request: Request, role: str, load: Loader) -> Response:
+    """Serves a GET from the cached entry, or loads it and caches it.
+
+    The ETag and Last-Modified are stored with the body, so a 304 always
+    stands for the body that would have been sent. Loaders read from the
+    primary (async_read_session), because a lagging replica's body would be
+    cached for everyone. Call it after authorization has run; the key only
+    varies on path, query and role.
+    """
+    if not Config.RESPONSE_CACHE_ENABLED:
+        cached, _ = await load()
+        return await cached_body_response(request, cached, {})
+
+    key = response_cache_key(request, role)
+    try:
+        entry = await redis_client.hgetall(key)  # type: ignore
+    except REDIS_ERRORS as e:
+        logger.warning("Response cache read failed: %s", e)
+        entry = {}
+
+    if entry:
+        cached = decode_cached_body(entry)
+        return await cached_body_response(request, cached, {"X-Cache": "HIT"})
+
+    cached, surrogate_keys = await load()
+    await store_response(key, cached, surrogate_keys)
+
+    return await cached_body_response(request, cached, {"X-Cache": "MISS"})
+
+
+async def store_response(
+    key: str, cached: CachedBody, surrogate_keys: list[str]
+) -> None:
+    ttl = Config.RESPONSE_CACHE_TTL
+    fields = [item for pair in encode_cached_body(cached).items() for item in pair]
+    commands: list[tuple] = [("HSET", key, *fields), ("EXPIRE", key, ttl)]
+    for surrogate_key in surrogate_keys:
+        # refreshed on every store, so a tag lives as long as its newest entry
+        commands.append(("SADD", surrogate_set_key(surrogate_key), key))
+        commands.append(("EXPIRE", surrogate_set_key(surrogate_key), ttl))
+    try:
+        await pipelined(commands)
+    except REDIS_ERRORS as e:
+        logger.warning("Response cache write failed: %s", e)
+
+
+async def purge_surrogate_keys(surrogate_keys: Iterable[str]) -> None:
+    """Drops every cached response tagged with any of the surrogate keys.
+
+    Call it after the write has committed, or a concurrent miss can cache
+    the old rows again. Entries cached by a miss that read before the
+    commit and stored after the purge live until RESPONSE_CACHE_TTL.
+    """
+    tag_keys = [surrogate_set_key(surrogate_key) for surrogate_key in surrogate_keys]
+    try:
+        members = await pipelined(("SMEMBERS", tag_key) for tag_key in tag_keys)
+
+        # one key per command, so this also works when keys span cluster slots
+        keys = [*set().union(*members), *tag_keys]
+        await pipelined(("DEL", key) for key in keys)
+    except REDIS_ERRORS as e:
+        logger.warning("Response cache purge failed: %s", e)
+
+
+# stores an entry unless a write has bumped the generation since its load
+# started; the braces keep both keys in one cluster slot
+store_if_current_script = redis_client.register_script(
+    """
+    local current = tonumber(redis.call("GET", KEYS[2]) or "0")
+    if tonumber(ARGV[1]) < current then
+        return 0
+    end
+    redis.call("HSET", KEYS[1], unpack(ARGV, 3))
+    redis.call("EXPIRE", KEYS[1], ARGV[2])
+    return 1
+    """
+)
+
+
+class StaleWhileRevalidateCache:
+    """A single cached body that outlives its freshness.
+
+    For stale_ttl seconds after fresh_ttl runs out the stale body is still
+    served at once, while one background task, elected through a Redis
+    lock across all processes, loads a new one. Only a cold entry makes a
+    request wait for the loader. The loader opens its own session because
+    the refresh outlives the request that started it.
+
+    Writes bump a generation counter instead of deleting the entry, which
+    turns it stale the same way, and a load that started before the bump
+    is not stored.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        load: Callable[[], Awaitable[CachedBody]],
+        fresh_ttl: int,
+        stale_ttl: int,
+        lock_timeout: int,
+        invalidate_on_write: bool,
+    ) -> None:
+        self.key = f"swr_cache:{{{key}}}"
+        self.generation_key = f"swr_cache_generation:{{{key}}}"
+        self.lock_key = f"swr_cache_lock:{{{key}}}"
+        self.load = load
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.invalidate_on_write = invalidate_on_write
+        self.refreshes: set[asyncio.Task] = set()
+
+    async def get(self) -> tuple[CachedBody, str]:
+        """Returns the body and whether it was a HIT, STALE or MISS"""
+        try:
+            entry, generation = await pipelined(
+                [("HGETALL", self.key), ("GET", self.generation_key)]
+            )
+        except REDIS_ERRORS as e:
+            logger.warning("Stale-while-revalidate read failed: %s", e)
+            entry, generation = {}, None
+        generation = int(generation or 0)
+
+        if entry:
+            cached = decode_cached_body(entry)
+            if (
+                int(entry[b"generation"]) >= generation
+                and time.time() < float(entry[b"fresh_until"])
+            ):
+                return cached, "HIT"
+
+            await self.refresh_in_background()
+            return cached, "STALE"
+
+        cached = await self.load()
+        await self.store(cached, generation)
+
+        return cached, "MISS"
+
+    async def refresh_in_background(self) -> None:
+        token = str(uuid.uuid4())
+        try:
+            elected = await redis_client.set(
+                name=self.lock_key, value=token, ex=self.lock_timeout, nx=True
+            )
+        except REDIS_ERRORS as e:
+            logger.warning("Stale-while-revalidate lock failed: %s", e)
+            return
+
+        if elected:
+            task = asyncio.create_task(self.refresh(token))
+            self.refreshes.add(task)  # the loop only keeps weak references
+            task.add_done_callback(self.refreshes.discard)
+
+    async def refresh(self, token: str) -> None:
+        try:
+            # read before loading, so a write during the load wins
+            generation = int(await redis_client.get(self.generation_key) or 0)
+            await self.store(await self.load(), generation)
+        except Exception as e:
+            # the lock stays until it times out, which spaces out retries
+            logger.exception(e)
+            return
+
+        try:
+            await release_lock(self.lock_key, token)
+        except REDIS_ERRORS as e:
+            logger.warning("Stale-while-revalidate unlock failed: %s", e)
+
+    async def store(self, cached: CachedBody, generation: int) -> None:
+        entry = {
+            **encode_cached_body(cached),
+            "fresh_until": time.time() + self.fresh_ttl,
+            "generation": generation,
+        }
+        fields = [item for pair in entry.items() for item in pair]
+        try:
+            stored = await store_if_current_script(
+                keys=[self.key, self.generation_key],
+                args=[generation, self.fresh_ttl + self.stale_ttl, *fields],
+            )
+        except REDIS_ERRORS as e:
+            logger.warning("Stale-while-revalidate write failed: %s", e)
+            return
+
+        if not stored:
+            logger.info("Stale-while-revalidate load superseded by a write")
+
+    async def invalidate(self) -> None:
+        """Marks the entry stale after a write, when INVALIDATE_ON_WRITE is set.
+
+        Readers keep getting the old body while one of them refreshes it,
+        so a write doesn't send every concurrent request to the database.
+        """
+        if not self.invalidate_on_write:
+            return
+
+        try:
+            await redis_client.incr(self.generation_key)
+        except REDIS_ERRORS as e:
+            logger.warning("Stale-while-revalidate invalidation failed: %s", e)
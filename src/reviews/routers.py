@@ -1,9 +1,9 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, Request, status, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-from src.db.main import get_session
+from src.db.main import async_read_session, get_session
 from src.auth.dependencies import (
     RoleChecker,
     TokenBearer,
@@ -13,7 +13,11 @@ from src.auth.dependencies import (
 )
 from src.reviews.schemas import ReviewCreateSchema, ReviewSchema
 from src.reviews.service import ReviewService
+from src.conditional import make_etag
 from src.errors import ReviewNotFound
+from src.idempotency import idempotent
+from src.response_cache import cached_response, purge_surrogate_keys
+from src.serialization import trusted_response
 
 
 review_router = APIRouter()
@@ -28,6 +32,7 @@ admin_user_role = RoleChecker(["admin", "user"])
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(admin_user_role)],
 )
+@idempotent
 async def add_review(
     book_uid: str,
     review_data: ReviewCreateSchema,
@@ -40,6 +45,7 @@ async def add_review(
         review_data=review_data,
         session=session,
     )
+    await purge_surrogate_keys(["reviews:list", f"book:{book_uid}"])
 
     return new_review
 
@@ -47,9 +53,23 @@ async def add_review(
 @review_router.get(
     "/", response_model=List[ReviewSchema], dependencies=[Depends(admin_user_role)]
 )
-async def get_all_reviews(session: AsyncSession = Depends(get_session)):
-    reviews = await review_service.get_all_reviews(session)
-    return reviews
+async def get_all_reviews(
+    request: Request,
+    current_user=Depends(get_current_user),
+):
+    async def load():
+        async with async_read_session() as session:
+            reviews = await review_service.get_all_reviews(session)
+
+        body = trusted_response(reviews, ReviewSchema).body
+        if not reviews:
+            return (body, None, None), ["reviews:list"]
+
+        last_modified = max(review.updated_at for review in reviews)
+        etag = make_etag("reviews", len(reviews), last_modified)
+        return (body, etag, last_modified), ["reviews:list"]
+
+    return await cached_response(request, current_user.role, load)
 
 
 @review_router.get(
@@ -59,13 +79,21 @@ async def get_all_reviews(session: AsyncSession = Depends(get_session)):
 )
 async def get_review(
     review_uid: str,
-    session: AsyncSession = Depends(get_session),
+    request: Request,
+    current_user=Depends(get_current_user),
 ):
-    review = await review_service.get_review(review_uid, session)
-    if not review:
-        raise ReviewNotFound()
+    async def load():
+        async with async_read_session() as session:
+            review = await review_service.get_review(review_uid, session)
+        if not review:
+            raise ReviewNotFound()
+
+        body = trusted_response(review, ReviewSchema).body
+        etag = make_etag(review_uid, review.updated_at)
+        surrogate_keys = [f"review:{review_uid}", f"book:{review.book_uid}"]
+        return (body, etag, review.updated_at), surrogate_keys
 
-    return review
+    return await cached_response(request, current_user.role, load)
 
 
 @review_router.delete(
@@ -79,5 +107,6 @@ async def delete_review(
     current_user=Depends(get_current_user),
 ):
     await review_service.delete_review(review_uid, current_user.email, session)
+    await purge_surrogate_keys(["reviews:list", f"review:{review_uid}"])
 
     return {}
@@ -1,5 +1,6 @@
 import uuid
 from fastapi import HTTPException, status
+from sqlalchemy import bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select, desc
 from datetime import datetime
@@ -14,6 +15,9 @@ from src.errors import BookNotFound, UserNotFound, ReviewNotFound
 book_service = BookService()
 user_service = AuthService()
 
+get_review_statement = select(Review).where(Review.uid == bindparam("review_uid"))
+get_all_reviews_statement = select(Review).order_by(desc(Review.created_at))
+
 
 class ReviewService:
     async def add_review_book(
@@ -48,14 +52,14 @@ class ReviewService:
         review_uid: str,
         session: AsyncSession,
     ):
-        statement = select(Review).where(Review.uid == review_uid)
-        result = await session.execute(statement)
+        result = await session.execute(
+            get_review_statement, {"review_uid": review_uid}
+        )
 
         return result.scalar_one_or_none()
 
     async def get_all_reviews(self, session: AsyncSession):
-        statement = select(Review).order_by(desc(Review.created_at))
-        result = await session.execute(statement)
+        result = await session.execute(get_all_reviews_statement)
 
         return result.scalars().all()
 
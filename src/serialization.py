@@ -0,0 +1,81 @@
+import collections.abc
+import typing
+from functools import lru_cache
+from typing import Any, Optional, Union
+
+import orjson
+from fastapi import Response, status
+from pydantic import BaseModel
+
+# (field name, plan of the nested schema or None, whether it holds a list)
+FieldPlan = tuple[tuple[str, Optional["FieldPlan"], bool], ...]
+
+
+def unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+
+    return annotation
+
+
+@lru_cache(maxsize=None)
+def field_plan(schema: type[BaseModel]) -> FieldPlan:
+    """Which attributes to read for a schema, worked out once per schema"""
+    plan = []
+    for name, field in schema.model_fields.items():
+        if field.exclude:
+            continue
+
+        annotation = unwrap_optional(field.annotation)
+        many = typing.get_origin(annotation) in (list, collections.abc.Sequence)
+        if many:
+            annotation = typing.get_args(annotation)[0]
+
+        nested = None
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            nested = field_plan(annotation)
+        plan.append((name, nested, many))
+
+    return tuple(plan)
+
+
+def dump_fields(obj: Any, plan: FieldPlan) -> dict:
+    # loaded ORM attributes sit in the instance dict; reading them there is
+    # several times cheaper than going through the instrumented descriptor
+    values = obj.__dict__
+    data = {}
+    for name, nested, many in plan:
+        value = values[name] if name in values else getattr(obj, name)
+        if nested is not None and value is not None:
+            if many:
+                value = [dump_fields(item, nested) for item in value]
+            else:
+                value = dump_fields(value, nested)
+        data[name] = value
+
+    return data
+
+
+def trusted_response(
+    content: Any, schema: type[BaseModel], status_code: int = status.HTTP_200_OK
+) -> Response:
+    """Serializes ORM rows straight to JSON with the fields of a response schema.
+
+    Rows loaded from our own database already satisfy the schema, so this
+    skips the validation FastAPI runs against response_model. Keep the
+    response_model on the route for the OpenAPI schema.
+    """
+    plan = field_plan(schema)
+    if isinstance(content, (list, tuple)):
+        data: Any = [dump_fields(item, plan) for item in content]
+    else:
+        data = dump_fields(content, plan)
+
+    # OPT_UTC_Z writes UTC offsets as "Z", matching pydantic's output
+    return Response(
+        content=orjson.dumps(data, option=orjson.OPT_UTC_Z),
+        status_code=status_code,
+        media_type="application/json",
+    )